@@ -0,0 +1,76 @@
+#!python
+
+
+""" DisjointSet Class
+A union-find forest with path compression and union by rank, used by
+Graph to keep track of its (weakly) connected components as edges are
+added.
+"""
+
+
+class DisjointSet(object):
+
+    def __init__(self):
+        """Initialize an empty forest."""
+        self.parent = {}
+        self.rank = {}
+        self.count = 0
+
+    def __contains__(self, item):
+        """Return True if item has been added to the forest."""
+        return item in self.parent
+
+    def __len__(self):
+        """Return the number of items in the forest."""
+        return len(self.parent)
+
+    def add(self, item):
+        """Add item as a set of its own, unless it is already in the forest."""
+        if item not in self.parent:
+            self.parent[item] = item
+            self.rank[item] = 0
+            self.count += 1
+
+    def find(self, item):
+        """Return the representative of the set containing item."""
+        parent = self.parent
+        # Raise error if not in the forest
+        if item not in parent:
+            raise KeyError(f'{item} is not in the disjoint set')
+        root = item
+        while parent[root] != root:
+            root = parent[root]
+        # Point everything on the way straight at the root
+        while parent[item] != root:
+            parent[item], item = root, parent[item]
+        return root
+
+    def union(self, a, b):
+        """Merge the sets containing a and b and return True if they were separate."""
+        root_a = self.find(a)
+        root_b = self.find(b)
+        if root_a == root_b:
+            return False
+        self.link(root_a, root_b)
+        return True
+
+    def link(self, root_a, root_b):
+        """Merge two different sets given their representatives."""
+        # Hang the shallower tree under the deeper one
+        if self.rank[root_a] < self.rank[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        if self.rank[root_a] == self.rank[root_b]:
+            self.rank[root_a] += 1
+        self.count -= 1
+
+    def connected(self, a, b):
+        """Return True if a and b are in the same set."""
+        return self.find(a) == self.find(b)
+
+    def sets(self):
+        """Return every set in the forest as a list of sets."""
+        groups = {}
+        for item in self.parent:
+            groups.setdefault(self.find(item), set()).add(item)
+        return list(groups.values())
@@ -0,0 +1,41 @@
+#!python
+
+from disjoint_set import DisjointSet
+import unittest
+
+
+class DisjointSetTest(unittest.TestCase):
+
+    def test_union_find(self):
+        forest = DisjointSet()
+        for item in range(1000, 1010):
+            forest.add(item)
+        forest.add(1000)
+        assert len(forest) == 10 and forest.count == 10
+
+        assert forest.union(1000, 1001)
+        assert forest.union(1002, 1001)
+        assert not forest.union(1000, 1002)
+        assert forest.union(1005, 1006)
+        assert forest.connected(1002, 1000)
+        assert not forest.connected(1002, 1005)
+        assert forest.count == 7
+        self.assertCountEqual(forest.sets(), [{1000, 1001, 1002}, {1005, 1006}, {1003}, {1004},
+                                              {1007}, {1008}, {1009}])
+        with self.assertRaises(KeyError):
+            forest.find(1)
+
+    def test_path_compression(self):
+        forest = DisjointSet()
+        for item in range(100000):
+            forest.add(item)
+        for item in range(1, 100000):
+            forest.union(item - 1, item)
+        root = forest.find(99999)
+        # Every item on the way now points straight at the root
+        assert forest.parent[99999] == root
+        assert forest.count == 1
+
+
+if __name__ == "__main__":
+    unittest.main()
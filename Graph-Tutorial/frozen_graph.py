@@ -0,0 +1,633 @@
+#!python
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappop, heappush, nlargest
+from multiprocessing import shared_memory
+import math
+import mmap
+import struct
+import sys
+
+
+""" FrozenGraph Class
+An immutable compressed-sparse-row (CSR) snapshot of a Graph.
+
+Vertex keys are mapped to dense int ids 0..n-1. The out-neighbors of
+vertex i are targets[offsets[i]:offsets[i + 1]], sorted by id, and the
+matching edge weights sit at the same positions in weights. Directed
+snapshots also keep the transposed arrays (in_offsets, in_sources,
+in_weights) so searches can walk edges backward.
+"""
+
+
+class FrozenGraph(object):
+
+    def __init__(self, keys, offsets, targets, weights, directed=True, weighted=False,
+                 in_offsets=None, in_sources=None, in_weights=None, key_order=None):
+        """Initialize a snapshot from its key table and CSR arrays.
+
+        key_order: optional ids sorted by key, used to look keys up by
+        binary search instead of building a dictionary of every key.
+        """
+        self.keys = keys
+        self.key_order = key_order
+        if key_order is None:
+            self.index = {key: i for i, key in enumerate(keys)}
+        else:
+            self.index = None
+        self.num_vertices = len(keys)
+        self.directed = directed
+        self.weighted = weighted
+
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+
+        # Undirected snapshots store both directions of every edge,
+        # so the out-edges already are the in-edges
+        if directed and in_offsets is None:
+            in_offsets, in_sources, in_weights = _transpose(offsets, targets, weights)
+        if not directed:
+            in_offsets, in_sources, in_weights = offsets, targets, weights
+        self.in_offsets = in_offsets
+        self.in_sources = in_sources
+        self.in_weights = in_weights
+
+        # Memoryviews slice the buffers without copying them
+        self._targets = memoryview(targets)
+        self._sources = memoryview(in_sources)
+        # The shared memory block the arrays live in, if attached to one
+        self.shared_memory = None
+
+    def __reduce__(self):
+        '''Pickle as plain lists and arrays, whatever buffers back the snapshot'''
+        return (FrozenGraph, (list(self.keys), _copy(self.offsets), _copy(self.targets),
+                              _copy(self.weights), self.directed, self.weighted,
+                              _copy(self.in_offsets), _copy(self.in_sources),
+                              _copy(self.in_weights)))
+
+    @property
+    def num_edges(self):
+        """Return the number of stored (directed) adjacency entries."""
+        return len(self.targets)
+
+    def vertex_id(self, key):
+        """Return the dense id of the vertex with the given key."""
+        if self.index is None:
+            return self._search_key(key)
+        # Raise error if not in graph
+        if key not in self.index:
+            raise KeyError(f'Vertex {key} is not in the graph')
+        return self.index[key]
+
+    def _search_key(self, key):
+        '''Binary search the sorted key order for the id of key'''
+        keys, key_order = self.keys, self.key_order
+        low, high = 0, len(key_order)
+        try:
+            while low < high:
+                middle = (low + high) // 2
+                if keys[key_order[middle]] < key:
+                    low = middle + 1
+                else:
+                    high = middle
+        except TypeError:
+            # A key of another type can't be in the table
+            low = len(key_order)
+        if low == len(key_order) or keys[key_order[low]] != key:
+            raise KeyError(f'Vertex {key} is not in the graph')
+        return key_order[low]
+
+    def save(self, path):
+        '''Write the snapshot to path in the binary CSR format read by load_binary'''
+        with open(path, 'wb') as file:
+            for chunk in self._binary_chunks():
+                file.write(chunk)
+
+    def to_shared_memory(self, name=None):
+        '''Copy the snapshot into a new shared memory block in the binary format and return the block
+
+        Other processes open it with attach_shared_memory(block.name)
+        without copying. The caller unlinks the block once done with it.
+        '''
+        chunks = list(self._binary_chunks())
+        memory = shared_memory.SharedMemory(name, create=True, size=sum(len(chunk) for chunk in chunks))
+        position = 0
+        for chunk in chunks:
+            memory.buf[position:position + len(chunk)] = chunk
+            position += len(chunk)
+        return memory
+
+    def _binary_chunks(self):
+        '''Return the header and the padded sections of the binary format as byte buffers'''
+        int_keys = all(type(key) is int for key in self.keys)
+        if not int_keys and not all(isinstance(key, str) for key in self.keys):
+            raise TypeError('binary graphs need all int or all str vertex keys')
+        float_weights = _typecode(self.weights) == 'd'
+
+        if int_keys:
+            key_table = [array('q', self.keys)]
+            key_bytes = 0
+        else:
+            encoded = [key.encode('utf-8') for key in self.keys]
+            key_offsets = array('q', [0])
+            for key in encoded:
+                key_offsets.append(key_offsets[-1] + len(key))
+            key_bytes = key_offsets[-1]
+            key_table = [key_offsets, b''.join(encoded)]
+        key_order = array('q', sorted(range(self.num_vertices), key=self.keys.__getitem__))
+
+        flags = ((_DIRECTED if self.directed else 0) | (_WEIGHTED if self.weighted else 0) |
+                 (_FLOAT_WEIGHTS if float_weights else 0) | (_INT_KEYS if int_keys else 0) |
+                 (_BIG_ENDIAN if sys.byteorder == 'big' else 0))
+        sections = [self.offsets, self.targets, self.weights]
+        if self.directed:
+            sections += [self.in_offsets, self.in_sources, self.in_weights]
+        sections += key_table + [key_order]
+
+        chunks = [_HEADER.pack(_MAGIC, _VERSION, flags, self.num_vertices, self.num_edges, key_bytes)]
+        for section in sections:
+            data = memoryview(section).cast('B')
+            chunks.append(data)
+            # Pad every section so the next one stays 8-byte aligned
+            chunks.append(bytes(-len(data) % 8))
+        return chunks
+
+    def out_degrees(self):
+        """Return an array of the number of out-edges of every id."""
+        offsets = self.offsets
+        return array('q', (offsets[i + 1] - offsets[i] for i in range(self.num_vertices)))
+
+    def in_degrees(self):
+        """Return an array of the number of in-edges of every id."""
+        in_offsets = self.in_offsets
+        return array('q', (in_offsets[i + 1] - in_offsets[i] for i in range(self.num_vertices)))
+
+    def neighbor_ids(self, vertex_id):
+        """Return the ids of the out-neighbors of a vertex without copying."""
+        return self._targets[self.offsets[vertex_id]:self.offsets[vertex_id + 1]]
+
+    def in_neighbor_ids(self, vertex_id):
+        """Return the ids of the in-neighbors of a vertex without copying."""
+        return self._sources[self.in_offsets[vertex_id]:self.in_offsets[vertex_id + 1]]
+
+    def get_edge_list(self):
+        '''Return a set of edges, in the same format as Graph.get_edge_list'''
+        edge_list = set()
+        keys = self.keys
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+
+        for from_id in range(self.num_vertices):
+            for position in range(offsets[from_id], offsets[from_id + 1]):
+                to_id = targets[position]
+                # Undirected edges are stored twice, keep the one with from_id <= to_id
+                if not self.directed and to_id < from_id:
+                    continue
+                if self.weighted:
+                    edge_list.add((keys[from_id], keys[to_id], weights[position]))
+                else:
+                    edge_list.add((keys[from_id], keys[to_id]))
+
+        return edge_list
+
+    def breadth_first_search(self, key, n):
+        '''Return the keys of the vertices exactly n edges away from key'''
+        start_id = self.vertex_id(key)
+
+        # One byte per vertex marks the vertices already visited
+        visit = bytearray(self.num_vertices)
+        visit[start_id] = 1
+        frontier = [start_id]
+
+        for _ in range(n):
+            next_frontier = []
+            for u in frontier:
+                for v in self.neighbor_ids(u):
+                    if not visit[v]:
+                        visit[v] = 1
+                        next_frontier.append(v)
+            frontier = next_frontier
+            # Stop early once there are no more levels
+            if len(frontier) == 0:
+                return set()
+
+        return {self.keys[i] for i in frontier}
+
+    def multi_source_distances(self, sources, block_size=1024):
+        '''Return one array of BFS distances per source key, indexed by vertex id, -1 if unreachable
+
+        The sources are expanded together as a frontier matrix: every
+        vertex carries a bitset (a Python int) of the sources whose
+        frontier reached it, so one pass over an edge advances up to
+        block_size sources at once.
+        '''
+        source_ids = [self.vertex_id(key) for key in sources]
+        distances = [array('q', [-1]) * self.num_vertices for _ in source_ids]
+        for first in range(0, len(source_ids), block_size):
+            self._bitset_search(source_ids[first:first + block_size],
+                                distances[first:first + block_size])
+        return distances
+
+    def _bitset_search(self, source_ids, distances):
+        '''Level-synchronous BFS from every source id at once, filling distances'''
+        offsets, targets = self.offsets, self._targets
+        # Bit j of visit[v] is set once source j has reached v
+        visit = [0] * self.num_vertices
+        frontier = {}
+        for j, source_id in enumerate(source_ids):
+            visit[source_id] |= 1 << j
+            frontier[source_id] = frontier.get(source_id, 0) | 1 << j
+            distances[j][source_id] = 0
+
+        distance = 0
+        while len(frontier) > 0:
+            distance += 1
+            # Multiply the frontier by the adjacency matrix, OR-ing rows together
+            reached = {}
+            for u, bits in frontier.items():
+                for v in targets[offsets[u]:offsets[u + 1]]:
+                    reached[v] = reached.get(v, 0) | bits
+
+            # Mask out the sources that had already reached each vertex
+            frontier = {}
+            for v, bits in reached.items():
+                bits &= ~visit[v]
+                if bits:
+                    visit[v] |= bits
+                    frontier[v] = bits
+                    # Record the distance for every source that just arrived
+                    while bits:
+                        low = bits & -bits
+                        distances[low.bit_length() - 1][v] = distance
+                        bits ^= low
+
+    def find_shortest_path(self, start, end, bidirectional=False):
+        '''Return the keys along a shortest path from start to end, or None'''
+        start_id = self.vertex_id(start)
+        end_id = self.vertex_id(end)
+
+        # A vertex is zero edges away from itself
+        if start_id == end_id:
+            return [start]
+
+        if bidirectional:
+            path = self._bidirectional_search(start_id, end_id)
+        else:
+            path = self._search(start_id, end_id)
+
+        if path is None:
+            return None
+        return [self.keys[i] for i in path]
+
+    def find_weighted_shortest_path(self, start, end, heuristic=None):
+        '''Return the keys along a lowest weight path from start to end, or None
+
+        heuristic(key, end_key) turns the Dijkstra search into A*, see
+        Graph.find_weighted_shortest_path.
+        '''
+        start_id = self.vertex_id(start)
+        end_id = self.vertex_id(end)
+
+        distances, parents = self._dijkstra(start_id, end_id, heuristic)
+        if end_id not in parents:
+            return None
+        return [self.keys[i] for i in _build_path(parents, end_id)]
+
+    def shortest_distances(self, start):
+        '''Return a dictionary of every key reachable from start to its weighted distance'''
+        distances, _ = self._dijkstra(self.vertex_id(start))
+        return {self.keys[i]: distance for i, distance in distances.items()}
+
+    def _dijkstra(self, start_id, end_id=-1, heuristic=None):
+        '''Binary heap Dijkstra over the CSR arrays, stopping early once end_id is settled'''
+        offsets, targets, weights, keys = self.offsets, self.targets, self.weights, self.keys
+        distances = {start_id: 0}
+        parents = {start_id: -1}
+        settled = set()
+        heap = [(0, start_id)]
+
+        while len(heap) > 0:
+            _, u = heappop(heap)
+            # Skip stale heap entries
+            if u in settled:
+                continue
+            if u == end_id:
+                break
+            settled.add(u)
+
+            for position in range(offsets[u], offsets[u + 1]):
+                v, weight = targets[position], weights[position]
+                if weight < 0:
+                    raise ValueError(f'Edge {keys[u]} -> {keys[v]} has a negative weight')
+                distance = distances[u] + weight
+                if v not in distances or distance < distances[v]:
+                    distances[v] = distance
+                    parents[v] = u
+                    # A* orders the heap by distance plus the estimate left to go
+                    if heuristic is not None:
+                        heappush(heap, (distance + heuristic(keys[v], keys[end_id]), v))
+                    else:
+                        heappush(heap, (distance, v))
+
+        return distances, parents
+
+    def _search(self, start_id, end_id):
+        '''Single BFS pass over the CSR arrays that stops at end_id'''
+        parents = {start_id: -1}
+        frontier = [start_id]
+
+        while len(frontier) > 0:
+            next_frontier = []
+            for u in frontier:
+                for v in self.neighbor_ids(u):
+                    if v not in parents:
+                        parents[v] = u
+                        if v == end_id:
+                            return _build_path(parents, end_id)
+                        next_frontier.append(v)
+            frontier = next_frontier
+
+        return None
+
+    def _bidirectional_search(self, start_id, end_id):
+        '''Grow the smaller frontier from either end until the searches meet'''
+        forward, backward = {start_id: -1}, {end_id: -1}
+        forward_depth, backward_depth = {start_id: 0}, {end_id: 0}
+        forward_frontier, backward_frontier = [start_id], [end_id]
+
+        while len(forward_frontier) > 0 and len(backward_frontier) > 0:
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meet = _expand_level(
+                    forward_frontier, self.neighbor_ids, forward, forward_depth, backward_depth)
+                if meet is not None:
+                    tail, head = meet
+                    return _join_paths(forward, backward, tail, head)
+            else:
+                backward_frontier, meet = _expand_level(
+                    backward_frontier, self.in_neighbor_ids, backward, backward_depth, forward_depth)
+                if meet is not None:
+                    head, tail = meet
+                    return _join_paths(forward, backward, tail, head)
+
+        return None
+
+    def recommend(self, key, top_k=10, metric='common_neighbors'):
+        '''Return up to top_k (key, score) pairs of vertices two edges away from key, best first
+
+        metric: 'common_neighbors', 'jaccard' or 'adamic_adar'.
+        '''
+        if metric not in RECOMMEND_METRICS:
+            raise ValueError(f'metric must be one of {RECOMMEND_METRICS}, not {metric!r}')
+        keys = self.keys
+        return [(keys[i], score) for i, score in self._recommend(self.vertex_id(key), top_k, metric)]
+
+    def recommend_all(self, top_k=10, metric='common_neighbors', processes=None):
+        '''Return a dictionary of every key to its recommend list
+
+        processes: split the vertices into id ranges scored by that many
+        worker processes, each holding a copy of the snapshot.
+        '''
+        if metric not in RECOMMEND_METRICS:
+            raise ValueError(f'metric must be one of {RECOMMEND_METRICS}, not {metric!r}')
+        keys = self.keys
+        n = self.num_vertices
+        if processes is None or processes <= 1 or n < 2:
+            rows = [self._recommend(i, top_k, metric) for i in range(n)]
+        else:
+            # A few ranges per process evens out rows of different cost
+            step = max(1, -(-n // (processes * 4)))
+            ranges = [(start, min(n, start + step), top_k, metric) for start in range(0, n, step)]
+            rows = []
+            with ProcessPoolExecutor(processes, initializer=_init_recommend_worker,
+                                     initargs=(self,)) as executor:
+                for chunk in executor.map(_recommend_range, ranges):
+                    rows.extend(chunk)
+        return {keys[i]: [(keys[j], score) for j, score in row] for i, row in enumerate(rows)}
+
+    def _recommend(self, vertex_id, top_k, metric):
+        '''Return the top_k (id, score) pairs two edges away from vertex_id'''
+        offsets, targets = self.offsets, self.targets
+        row = self.neighbor_ids(vertex_id)
+        friends = set(row)
+        friends.add(vertex_id)
+
+        # Walking every friend's row scores each candidate by the friends
+        # it shares with vertex_id: one sparse row of the adjacency
+        # matrix squared, without intersecting rows pair by pair
+        scores = {}
+        for w in row:
+            if w == vertex_id:
+                continue
+            if metric == 'adamic_adar':
+                degree = self._degree(w)
+                # Only the edge to vertex_id, no candidates behind it
+                if degree < 2:
+                    continue
+                weight = 1 / math.log(degree)
+            else:
+                weight = 1
+            for position in range(offsets[w], offsets[w + 1]):
+                u = targets[position]
+                if u not in friends:
+                    scores[u] = scores.get(u, 0) + weight
+
+        if metric == 'jaccard':
+            # Shared friends over the friends of either, on directed
+            # graphs the vertices the candidate is followed by
+            degree = len(row)
+            in_offsets = self.in_offsets
+            for u, common in scores.items():
+                scores[u] = common / (degree + in_offsets[u + 1] - in_offsets[u] - common)
+        # Ties go to the lower id so results don't depend on dict order
+        return nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
+
+    def _degree(self, vertex_id):
+        '''Return the number of edges of a vertex, in either direction on directed graphs'''
+        degree = self.offsets[vertex_id + 1] - self.offsets[vertex_id]
+        if self.directed:
+            degree += self.in_offsets[vertex_id + 1] - self.in_offsets[vertex_id]
+        return degree
+
+
+RECOMMEND_METRICS = ('common_neighbors', 'jaccard', 'adamic_adar')
+
+# The snapshot of a recommend_all worker process
+_recommend_graph = None
+
+
+def _init_recommend_worker(frozen):
+    '''Store the snapshot sent to a recommend_all worker process'''
+    global _recommend_graph
+    _recommend_graph = frozen
+
+
+def _recommend_range(task):
+    '''Return the recommendations of the ids in one range of a recommend_all task'''
+    start, stop, top_k, metric = task
+    return [_recommend_graph._recommend(i, top_k, metric) for i in range(start, stop)]
+
+
+# Binary format: a fixed header followed by 8-byte aligned sections for
+# offsets, targets, weights, the in-edge arrays of directed graphs, the
+# key table and the ids sorted by key. Arrays are in native byte order.
+_MAGIC = b'GCSR'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHHqqq')
+_DIRECTED, _WEIGHTED, _FLOAT_WEIGHTS, _INT_KEYS, _BIG_ENDIAN = 1, 2, 4, 8, 16
+
+
+def load_binary(path):
+    '''Memory-map a graph saved with FrozenGraph.save and return it as a FrozenGraph'''
+    with open(path, 'rb') as file:
+        # The mapping stays valid after the file is closed
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return from_buffer(buffer)
+
+
+def attach_shared_memory(name):
+    '''Return the FrozenGraph published by FrozenGraph.to_shared_memory under name, without copying it'''
+    memory = shared_memory.SharedMemory(name)
+    frozen = from_buffer(memory.buf)
+    # The arrays are views into the block, so it stays open as long as they do
+    frozen.shared_memory = memory
+    return frozen
+
+
+def from_buffer(buffer):
+    '''Return a FrozenGraph whose arrays are views into buffer, without copying them'''
+    view = memoryview(buffer)
+    magic, version, flags, num_vertices, num_edges, key_bytes = _HEADER.unpack_from(view)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError('not a binary graph file')
+    if bool(flags & _BIG_ENDIAN) != (sys.byteorder == 'big'):
+        raise ValueError('binary graph was written with another byte order')
+    position = _HEADER.size
+
+    def section(count, typecode='q'):
+        nonlocal position
+        size = count * 8
+        data = view[position:position + size]
+        position += size + (-size % 8)
+        return data.cast(typecode)
+
+    weight_type = 'd' if flags & _FLOAT_WEIGHTS else 'q'
+    offsets = section(num_vertices + 1)
+    targets = section(num_edges)
+    weights = section(num_edges, weight_type)
+    in_offsets = in_sources = in_weights = None
+    if flags & _DIRECTED:
+        in_offsets = section(num_vertices + 1)
+        in_sources = section(num_edges)
+        in_weights = section(num_edges, weight_type)
+
+    if flags & _INT_KEYS:
+        keys = section(num_vertices)
+    else:
+        key_offsets = section(num_vertices + 1)
+        size = key_bytes
+        keys = _KeyTable(key_offsets, view[position:position + size])
+        position += size + (-size % 8)
+    key_order = section(num_vertices)
+
+    return FrozenGraph(keys, offsets, targets, weights,
+                       directed=bool(flags & _DIRECTED), weighted=bool(flags & _WEIGHTED),
+                       in_offsets=in_offsets, in_sources=in_sources, in_weights=in_weights,
+                       key_order=key_order)
+
+
+class _KeyTable(object):
+    '''Read-only sequence of str keys decoded on demand from a UTF-8 blob'''
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('key index out of range')
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], 'utf-8')
+
+
+def _typecode(buffer):
+    '''Return the array typecode of an array or memoryview'''
+    if isinstance(buffer, array):
+        return buffer.typecode
+    return memoryview(buffer).format
+
+
+def _copy(buffer):
+    '''Copy a buffer into a standalone array of the same type'''
+    return array(_typecode(buffer), buffer)
+
+
+def _transpose(offsets, targets, weights):
+    '''Build the CSR arrays of the reversed graph'''
+    num_vertices = len(offsets) - 1
+    weight_type = _typecode(weights)
+
+    # Count the in-edges of every vertex, then turn counts into offsets
+    counts = array('q', [0]) * (num_vertices + 1)
+    for v in targets:
+        counts[v + 1] += 1
+    for i in range(num_vertices):
+        counts[i + 1] += counts[i]
+    in_offsets = array('q', counts)
+
+    in_sources = array('q', [0]) * len(targets)
+    in_weights = array(weight_type, [0]) * len(targets)
+    # Sources are visited in increasing order, so each row comes out sorted
+    for u in range(num_vertices):
+        for position in range(offsets[u], offsets[u + 1]):
+            v = targets[position]
+            slot = counts[v]
+            in_sources[slot] = u
+            in_weights[slot] = weights[position]
+            counts[v] += 1
+
+    return in_offsets, in_sources, in_weights
+
+
+def _build_path(parents, end_id):
+    '''Follow parents back from end_id and return the ids in path order'''
+    path = [end_id]
+    parent = parents[end_id]
+    while parent != -1:
+        path.append(parent)
+        parent = parents[parent]
+    path.reverse()
+    return path
+
+
+def _expand_level(frontier, neighbor_ids, parents, depth, other_depth):
+    '''Expand one BFS level and return the next frontier and the best meeting edge'''
+    next_frontier = []
+    meet = None
+    meet_length = None
+
+    for u in frontier:
+        for v in neighbor_ids(u):
+            # Keep the shortest path through any edge into the other side
+            if v in other_depth:
+                length = depth[u] + 1 + other_depth[v]
+                if meet_length is None or length < meet_length:
+                    meet, meet_length = (u, v), length
+            if v not in parents:
+                parents[v] = u
+                depth[v] = depth[u] + 1
+                next_frontier.append(v)
+
+    return next_frontier, meet
+
+
+def _join_paths(forward, backward, tail, head):
+    '''Join the forward path ending at tail with the backward path starting at head'''
+    path = _build_path(forward, tail)
+    while head != -1:
+        path.append(head)
+        head = backward[head]
+    return path
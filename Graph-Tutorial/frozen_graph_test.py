@@ -0,0 +1,205 @@
+#!python
+
+from array import array
+from frozen_graph import _HEADER, attach_shared_memory, load_binary
+from graph import Graph
+import os
+import pickle
+import random
+import tempfile
+import unittest
+
+
+def random_graph(seed, directed=True, num_vertices=80, num_edges=240):
+    '''Build a random graph with integer keys'''
+    rand = random.Random(seed)
+    graph = Graph(directed=directed)
+    for key in range(num_vertices):
+        graph.add_vertex(key)
+    edges = set()
+    while len(edges) < num_edges:
+        from_key, to_key = rand.sample(range(num_vertices), 2)
+        if directed or (to_key, from_key) not in edges:
+            edges.add((from_key, to_key))
+    for from_key, to_key in edges:
+        graph.add_edge(from_key, to_key, rand.randint(1, 9))
+    return graph
+
+
+class FrozenGraphTest(unittest.TestCase):
+
+    def test_freeze(self):
+        graph = Graph()
+        graph.add_edge('Ramon Geronimo', 'Jessie Pichardo')
+        graph.add_edge('Ramon Geronimo', 'Juan Geronimo', 5)
+        graph.add_edge('Jessie Pichardo', 'Juan Geronimo')
+        frozen = graph.freeze()
+
+        assert frozen.num_vertices == 3
+        assert frozen.num_edges == 3
+        self.assertEqual(list(frozen.offsets), [0, 2, 3, 3])
+        self.assertEqual(list(frozen.targets), [1, 2, 2])
+        self.assertEqual(list(frozen.weights), [1, 5, 1])
+        self.assertEqual(list(frozen.in_neighbor_ids(frozen.vertex_id('Juan Geronimo'))), [0, 1])
+        with self.assertRaises(KeyError):
+            frozen.vertex_id('Joel Pichardo')
+
+    def test_get_edge_list(self):
+        for directed in (True, False):
+            graph = random_graph(1, directed)
+            frozen = graph.freeze()
+            if directed:
+                self.assertEqual(frozen.get_edge_list(), graph.get_edge_list())
+            else:
+                # Either orientation may be kept for an undirected edge
+                normalize = lambda edges: {(min(a, b), max(a, b), w) for a, b, w in edges}
+                self.assertEqual(normalize(frozen.get_edge_list()), normalize(graph.get_edge_list()))
+
+    def test_breadth_first_search(self):
+        graph = random_graph(2)
+        frozen = graph.freeze()
+        for vertex in graph:
+            for n in range(1, 5):
+                level = graph.breadth_first_search(vertex, n)
+                self.assertEqual(frozen.breadth_first_search(vertex.id, n), {v.id for v in level})
+
+    def test_find_shortest_path(self):
+        for directed in (True, False):
+            graph = random_graph(3, directed)
+            frozen = graph.freeze()
+            for start in range(0, 80, 7):
+                for end in range(0, 80, 5):
+                    path = graph.find_shortest_path(start, end)
+                    for bidirectional in (False, True):
+                        frozen_path = frozen.find_shortest_path(start, end, bidirectional)
+                        if path is None:
+                            assert frozen_path is None
+                            continue
+                        self.assertEqual(len(frozen_path), len(path))
+                        self.assertEqual((frozen_path[0], frozen_path[-1]), (start, end))
+                        for from_key, to_key in zip(frozen_path, frozen_path[1:]):
+                            assert graph.get_vertex(to_key) in graph.get_vertex(from_key).neighbors
+
+    def test_find_weighted_shortest_path(self):
+        graph = random_graph(6)
+        frozen = graph.freeze()
+        for start in range(0, 80, 9):
+            distances = graph.shortest_distances(start)
+            self.assertEqual(frozen.shortest_distances(start),
+                             {vertex.id: distance for vertex, distance in distances.items()})
+            for end in range(0, 80, 11):
+                path = frozen.find_weighted_shortest_path(start, end)
+                if graph.get_vertex(end) not in distances:
+                    assert path is None
+                    continue
+                # The path weight matches the distance Dijkstra settled on
+                weight = sum(graph.get_vertex(a).get_edge_weight(graph.get_vertex(b))
+                             for a, b in zip(path, path[1:]))
+                self.assertEqual(weight, distances[graph.get_vertex(end)])
+
+    def test_multi_source_distances(self):
+        for directed in (True, False):
+            graph = random_graph(7, directed, num_edges=150)
+            frozen = graph.freeze()
+            sources = list(range(0, 80, 3)) + [5, 5]
+            # Small blocks exercise the batching across several frontier matrices
+            for block_size in (1024, 7):
+                distances = frozen.multi_source_distances(sources, block_size)
+                self.assertEqual(len(distances), len(sources))
+                for source, row in zip(sources, distances):
+                    for key in range(80):
+                        path = graph.find_shortest_path(source, key)
+                        self.assertEqual(row[frozen.vertex_id(key)], -1 if path is None else len(path) - 1)
+            self.assertEqual(graph.multi_source_distances(sources), distances)
+
+    def test_pickle(self):
+        frozen = random_graph(4).freeze()
+        copy = pickle.loads(pickle.dumps(frozen))
+        self.assertEqual(copy.get_edge_list(), frozen.get_edge_list())
+        self.assertEqual(list(copy.in_sources), list(frozen.in_sources))
+
+    def test_save_binary(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'graph.bin')
+            for directed in (True, False):
+                graph = random_graph(5, directed)
+                frozen = graph.freeze()
+                graph.save_binary(path)
+                loaded = load_binary(path)
+
+                assert loaded.directed == directed and loaded.weighted
+                self.assertEqual(loaded.get_edge_list(), frozen.get_edge_list())
+                self.assertEqual(list(loaded.in_sources), list(frozen.in_sources))
+                self.assertEqual(loaded.find_shortest_path(3, 40), frozen.find_shortest_path(3, 40))
+                self.assertEqual(loaded.breadth_first_search(7, 2), frozen.breadth_first_search(7, 2))
+                with self.assertRaises(KeyError):
+                    loaded.vertex_id(80)
+                with self.assertRaises(KeyError):
+                    loaded.vertex_id('7')
+
+            graph = Graph()
+            graph.read_graph_from_file('graph_data.txt')
+            graph.add_edge('Jessie Pichardo', 'José Núñez', 2.5)
+            graph.save_binary(path)
+            loaded = load_binary(path)
+
+            self.assertEqual(list(loaded.keys), [vertex.id for vertex in graph])
+            self.assertEqual(loaded.get_edge_list(), graph.freeze().get_edge_list())
+            self.assertEqual(loaded.find_shortest_path('José Núñez', 'Danesky Orlandini'),
+                             graph.freeze().find_shortest_path('José Núñez', 'Danesky Orlandini'))
+            # A pickled copy no longer depends on the mapped file
+            copy = pickle.loads(pickle.dumps(loaded))
+            self.assertEqual(copy.get_edge_list(), loaded.get_edge_list())
+
+    def test_shared_memory(self):
+        for directed in (True, False):
+            frozen = random_graph(31, directed).freeze()
+            memory = frozen.to_shared_memory()
+            try:
+                attached = attach_shared_memory(memory.name)
+                assert attached.shared_memory is not None and frozen.shared_memory is None
+                self.assertEqual(attached.get_edge_list(), frozen.get_edge_list())
+                self.assertEqual(attached.find_shortest_path(3, 40), frozen.find_shortest_path(3, 40))
+                # Writes to the block show through the attached arrays
+                memory.buf[_HEADER.size:_HEADER.size + 8] = array('q', [7]).tobytes()
+                self.assertEqual(attached.offsets[0], 7)
+                del attached
+            finally:
+                memory.close()
+                memory.unlink()
+
+    def test_degrees(self):
+        for directed in (True, False):
+            graph = random_graph(29, directed)
+            frozen = graph.freeze()
+            self.assertEqual(frozen.out_degrees(), graph.out_degrees())
+            self.assertEqual(frozen.in_degrees(), graph.in_degrees())
+            assert sum(frozen.in_degrees()) == sum(frozen.out_degrees()) == frozen.num_edges
+        graph = Graph()
+        graph.add_edge('A', 'B')
+        graph.add_edge('C', 'B')
+        self.assertEqual(list(graph.out_degrees()), [1, 0, 1])
+        self.assertEqual(list(graph.in_degrees()), [0, 2, 0])
+
+    def test_recommend(self):
+        for directed in (True, False):
+            graph = random_graph(25, directed)
+            frozen = graph.freeze()
+            for metric in ('common_neighbors', 'jaccard', 'adamic_adar'):
+                everyone = frozen.recommend_all(5, metric, processes=2)
+                for key in range(0, 80, 3):
+                    expected = [(vertex.id, score) for vertex, score in graph.recommend(key, 5, metric)]
+                    for found in (frozen.recommend(key, 5, metric), everyone[key]):
+                        # Scores are summed in another order, so compare them loosely
+                        self.assertEqual([k for k, _ in found], [k for k, _ in expected])
+                        for (_, score), (_, expected_score) in zip(found, expected):
+                            self.assertAlmostEqual(score, expected_score)
+            # Candidates are two edges away and never already a neighbor
+            neighbors = set(frozen.neighbor_ids(7)) | {7}
+            two_hops = frozen.breadth_first_search(7, 2)
+            for key, _ in frozen.recommend(7, top_k=80):
+                assert key in two_hops and key not in neighbors
+
+
+if __name__ == "__main__":
+    unittest.main()
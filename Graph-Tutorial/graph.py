@@ -1,5 +1,17 @@
 #!python
+from array import array
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from disjoint_set import DisjointSet
+from frozen_graph import FrozenGraph, RECOMMEND_METRICS
+from functools import wraps
+from graph_cache import LRUCache
+from graph_stats import GraphStats
+from heapq import heappop, heappush, nlargest
+from itertools import count, repeat
+from threading import Lock
+from time import perf_counter
+import math
 import random
 
 
@@ -9,17 +21,24 @@ A helper class for the Graph class that defines vertices and vertex neighbors.
 
 
 class Vertex(object):
+    # Slots drop the per-instance __dict__, vertices are the bulk of a graph
+    __slots__ = ('id', 'index', 'neighbors', 'in_neighbors')
 
-    def __init__(self, vertex):
+    def __init__(self, vertex, index=0):
         """Initialize a vertex and its neighbors.
 
+        index: position of the vertex in its graph, used to order
+        the two endpoints of an edge.
         neighbors: set of vertices adjacent to self,
         stored in a dictionary with key = vertex,
         value = weight of edge between self and neighbor.
         """
         self.id = vertex
+        self.index = index
         self.neighbors = {}
-        self.parent = None
+        # vertices with an edge pointing to self, kept by directed graphs
+        # and only allocated once the first in-edge arrives
+        self.in_neighbors = None
 
     def add_neighbor(self, vertex, weight=1):
         """Add a neighbor along a weighted edge."""
@@ -39,6 +58,16 @@ class Vertex(object):
         # return the neighbors
         return set(self.neighbors.keys())
 
+    def iter_neighbors(self):
+        """Return a live view of the neighbors of this vertex without copying them."""
+        return self.neighbors.keys()
+
+    def iter_in_neighbors(self):
+        """Return a live view of the vertices with an edge to this vertex."""
+        if self.in_neighbors is None:
+            return ()
+        return self.in_neighbors.keys()
+
     def get_id(self):
         """Return the id of this vertex."""
         return self.id
@@ -60,6 +89,141 @@ class Vertex(object):
         
 
 
+def _parse_weight(token):
+    '''Parse an edge weight as an int when possible, otherwise as a float'''
+    try:
+        return int(token)
+    except ValueError:
+        return float(token)
+
+
+def _parse_edge(line):
+    '''Parse an edge line such as (a,b) or (a,b,weight) into a tuple'''
+    edge = line.strip().strip('()').split(',')
+    if len(edge) < 2:
+        raise ValueError(f'malformed edge line {line.rstrip()!r}')
+    if len(edge) == 3:
+        return (edge[0], edge[1], _parse_weight(edge[2]))
+    return (edge[0], edge[1])
+
+
+def _degeneracy_order(adjacency):
+    '''Order keys by repeatedly removing a key of smallest remaining degree'''
+    degree = {key: len(neighbors) for key, neighbors in adjacency.items()}
+    # Buckets of keys by remaining degree
+    buckets = [set() for _ in range(max(degree.values(), default=0) + 1)]
+    for key, d in degree.items():
+        buckets[d].add(key)
+
+    order = []
+    removed = set()
+    smallest = 0
+    for _ in range(len(adjacency)):
+        # The smallest degree drops by at most one per removal
+        smallest = max(smallest - 1, 0)
+        while len(buckets[smallest]) == 0:
+            smallest += 1
+        key = buckets[smallest].pop()
+        order.append(key)
+        removed.add(key)
+        for neighbor in adjacency[key]:
+            if neighbor not in removed:
+                buckets[degree[neighbor]].remove(neighbor)
+                degree[neighbor] -= 1
+                buckets[degree[neighbor]].add(neighbor)
+    return order
+
+
+def _bron_kerbosch(clique, candidates, excluded, adjacency):
+    '''Yield the maximal cliques extending clique, Bron-Kerbosch with Tomita pivoting'''
+    if len(candidates) == 0:
+        if len(excluded) == 0:
+            yield clique
+        return
+
+    # Pivot on the vertex covering the most candidates, whose
+    # neighbors then don't need a branch of their own
+    pivot = max(candidates | excluded, key=lambda u: len(candidates & adjacency[u]))
+    for key in list(candidates - adjacency[pivot]):
+        neighbors = adjacency[key]
+        yield from _bron_kerbosch(clique | {key}, candidates & neighbors,
+                                  excluded & neighbors, adjacency)
+        candidates.remove(key)
+        excluded.add(key)
+
+
+# Adjacency shared by the clique worker processes, set once per worker
+_clique_adjacency = None
+
+
+def _init_clique_worker(adjacency):
+    '''Store the adjacency sent to a clique worker process'''
+    global _clique_adjacency
+    _clique_adjacency = adjacency
+
+
+def _clique_branch(branch):
+    '''Return the maximal cliques of one top-level branch as lists of keys'''
+    key, candidates, excluded = branch
+    return [list(clique) for clique in _bron_kerbosch({key}, candidates, excluded, _clique_adjacency)]
+
+
+class _BFSLevels(object):
+    '''The BFS levels found so far from one source vertex, grown on demand'''
+
+    def __init__(self, vertex):
+        self.levels = [[vertex]]
+        self.visit = {vertex}
+        self.lock = Lock()
+
+    def level(self, n):
+        '''Return the set of vertices n edges away, continuing from the deepest level'''
+        # A negative level is the source itself, as in an uncached search,
+        # rather than a level counted from the deepest one
+        if n < 0:
+            return set(self.levels[0])
+        with self.lock:
+            levels, visit = self.levels, self.visit
+            while len(levels) <= n and len(levels[-1]) > 0:
+                next_level = []
+                for u in levels[-1]:
+                    for v in u.iter_neighbors():
+                        if v not in visit:
+                            visit.add(v)
+                            next_level.append(v)
+                levels.append(next_level)
+            # If there's no more levels
+            if n >= len(levels):
+                return set()
+            return set(levels[n])
+
+
+# Marks a cache lookup that found nothing, since None is a cached result
+_MISSING = object()
+
+
+def _timed(method):
+    '''Record the wall time of each call in Graph.stats while instrumentation is enabled'''
+    operation = method.__name__
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        stats = self.stats
+        # Disabled instrumentation costs one attribute check
+        if stats is None:
+            return method(self, *args, **kwargs)
+        start = perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            seconds = perf_counter() - start
+            stats.record(operation, seconds)
+            if self.stats_hook is not None:
+                self.stats_hook(operation, seconds, stats)
+
+    return wrapper
+
+
 """ Graph Class
 A class demonstrating the essential
 facts and functionalities of graphs.
@@ -73,6 +237,52 @@ class Graph:
         self.num_vertices = 0
         self.weighted = weighted
         self.directed = directed
+        # Number of edges, an undirected edge counts once
+        self.edge_count = 0
+        # Next Vertex.index to hand out
+        self._next_index = 0
+        # Weakly connected components, merged as edges are added
+        self._components = DisjointSet()
+        self._components_stale = False
+        # Set by removals: the forest may still join vertices whose
+        # last path was removed, a union-find can't split them apart
+        self._components_split = False
+        # Vertices removed since the last relabel, still held by the forest
+        self._removed_vertices = 0
+        # Bumped by every mutation so caches know when they are stale
+        self.version = 0
+        # Opt-in cache of BFS levels, see enable_bfs_cache
+        self.bfs_cache = None
+        # Opt-in cache of shortest paths, see enable_path_cache
+        self.path_cache = None
+        # Opt-in counters and timings, see enable_instrumentation
+        self.stats = None
+        self.stats_hook = None
+
+    def enable_path_cache(self, capacity=1024):
+        """Cache find_shortest_path results in up to capacity entries and return the cache."""
+        self.path_cache = LRUCache(capacity)
+        return self.path_cache
+
+    def enable_instrumentation(self, hook=None):
+        """Start collecting counters and timings and return the GraphStats they go to.
+
+        hook: optional callable hook(operation, seconds, stats) run
+        after every timed call.
+        """
+        self.stats = GraphStats()
+        self.stats_hook = hook
+        return self.stats
+
+    def disable_instrumentation(self):
+        """Stop collecting counters and timings."""
+        self.stats = None
+        self.stats_hook = None
+
+    def enable_bfs_cache(self, capacity=128):
+        """Cache the BFS levels of up to capacity source vertices and return the cache."""
+        self.bfs_cache = LRUCache(capacity)
+        return self.bfs_cache
 
     def add_vertex(self, key):
         """Add a new vertex object to the graph with the given key and return the vertex."""
@@ -81,10 +291,14 @@ class Graph:
             raise KeyError(f'Vertex {key} is already in the graph')
         # increment the number of vertices
         self.num_vertices += 1
+        self.version += 1
         # create a new vertex
-        new_vertex = Vertex(key)
+        new_vertex = Vertex(key, self._next_index)
+        self._next_index += 1
         # add the new vertex to the vertex list
         self.vertex_list[key] = new_vertex
+        if not self._components_stale:
+            self._components.add(new_vertex)
         # return the new vertex
         return new_vertex
 
@@ -117,40 +331,329 @@ class Graph:
         to_vertex = self.vertex_list[to_key]
 
         from_vertex.add_neighbor(to_vertex, weight)
+        if not self._components_stale:
+            self._components.union(from_vertex, to_vertex)
+        self.edge_count += 1
+        self.version += 1
 
         if not self.directed:
             to_vertex.add_neighbor(from_vertex, weight)
+        else:
+            # Keep the reverse edge so searches can walk backward
+            if to_vertex.in_neighbors is None:
+                to_vertex.in_neighbors = {}
+            to_vertex.in_neighbors[from_vertex] = weight
+
+    def add_edge_arrays(self, keys, sources, targets, weights=None):
+        '''Add the edges keys[sources[i]] -> keys[targets[i]] in bulk and return how many were processed
+
+        The compact form graph_loader parses into: every key is looked up
+        once instead of once per edge. weights: the weight of every edge,
+        or None if they are all 1. Duplicates overwrite like add_edges
+        and are counted in the result, which edge_count is not.
+        '''
+        vertex_list = self.vertex_list
+        vertices = []
+        for key in keys:
+            vertex = vertex_list.get(key)
+            if vertex is None:
+                vertex = self.add_vertex(key)
+            vertices.append(vertex)
+
+        if weights is not None and any(weight != 1 for weight in weights):
+            self.weighted = True
+        directed = self.directed
+        new_edges = 0
+        if weights is None:
+            weights = repeat(1, len(sources))
+        for source, target, weight in zip(sources, targets, weights):
+            from_vertex = vertices[source]
+            to_vertex = vertices[target]
+
+            if to_vertex not in from_vertex.neighbors:
+                new_edges += 1
+            from_vertex.neighbors[to_vertex] = weight
+            if not directed:
+                to_vertex.neighbors[from_vertex] = weight
+            else:
+                if to_vertex.in_neighbors is None:
+                    to_vertex.in_neighbors = {}
+                to_vertex.in_neighbors[from_vertex] = weight
+
+        self.edge_count += new_edges
+        if len(sources) > 0:
+            self.version += 1
+            self._components_stale = True
+        return len(sources)
+
+    def remove_edge(self, from_key, to_key):
+        """Remove the edge from `from_key` to `to_key` and return its weight."""
+        from_vertex = self.get_vertex(from_key)
+        to_vertex = self.get_vertex(to_key)
+        # Raise error if there is no such edge
+        if to_vertex not in from_vertex.neighbors:
+            raise KeyError(f'There is no edge from {from_key} to {to_key}')
+
+        weight = self._unlink(from_vertex, to_vertex)
+        self.edge_count -= 1
+        self.version += 1
+        self._components_split = True
+        return weight
+
+    def remove_vertex(self, key):
+        """Remove a vertex and every edge to or from it, and return the vertex."""
+        vertex = self.get_vertex(key)
+
+        # Only the vertex's own neighbors are touched, the in-neighbor
+        # index finds the edges pointing at it in a directed graph
+        removed = len(vertex.neighbors)
+        for neighbor in vertex.iter_neighbors():
+            if neighbor is vertex:
+                continue
+            if self.directed:
+                del neighbor.in_neighbors[vertex]
+            else:
+                del neighbor.neighbors[vertex]
+        for neighbor in vertex.iter_in_neighbors():
+            # A self loop was already counted as an out-edge
+            if neighbor is not vertex:
+                del neighbor.neighbors[vertex]
+                removed += 1
+
+        del self.vertex_list[key]
+        self.num_vertices -= 1
+        self.edge_count -= removed
+        self.version += 1
+        self._components_split = True
+        self._removed_vertices += 1
+        vertex.neighbors = {}
+        vertex.in_neighbors = None
+        return vertex
+
+    def update_weight(self, from_key, to_key, weight):
+        """Set the weight of the existing edge from `from_key` to `to_key`."""
+        from_vertex = self.get_vertex(from_key)
+        to_vertex = self.get_vertex(to_key)
+        # Raise error if there is no such edge
+        if to_vertex not in from_vertex.neighbors:
+            raise KeyError(f'There is no edge from {from_key} to {to_key}')
+
+        if weight != 1 and not self.weighted:
+            self.weighted = True
+        from_vertex.neighbors[to_vertex] = weight
+        if not self.directed:
+            to_vertex.neighbors[from_vertex] = weight
+        else:
+            to_vertex.in_neighbors[from_vertex] = weight
+        self.version += 1
+
+    def apply_mutations(self, adds=(), removes=()):
+        '''Remove (from_key, to_key) edges, then add edges as add_edges does, and return (added, removed)
+
+        Removed edges that aren't in the graph are skipped, so a batch
+        never stops half applied. Removing and adding the same edge
+        leaves it with the new weight.
+        '''
+        vertex_list = self.vertex_list
+        removed = 0
+        for edge in removes:
+            from_vertex = vertex_list.get(edge[0])
+            to_vertex = vertex_list.get(edge[1])
+            if from_vertex is None or to_vertex is None or to_vertex not in from_vertex.neighbors:
+                continue
+            self._unlink(from_vertex, to_vertex)
+            removed += 1
+        if removed > 0:
+            self.edge_count -= removed
+            self.version += 1
+            self._components_split = True
+
+        added = self.add_edges(adds)
+        return added, removed
+
+    def _unlink(self, from_vertex, to_vertex):
+        '''Drop the edge from from_vertex to to_vertex from both adjacency dictionaries and return its weight'''
+        weight = from_vertex.neighbors.pop(to_vertex)
+        if not self.directed:
+            # A self loop has a single entry
+            if to_vertex is not from_vertex:
+                del to_vertex.neighbors[from_vertex]
+        else:
+            del to_vertex.in_neighbors[from_vertex]
+        return weight
+
+    def add_edges(self, edges):
+        '''Add (from_key, to_key) or (from_key, to_key, weight) edges in bulk and return how many were added'''
+        # Unlike add_edge, duplicate edges aren't checked for
+        # and simply overwrite the weight of the existing edge
+        vertex_list = self.vertex_list
+        directed = self.directed
+        weighted = self.weighted
+        count = 0
+        new_edges = 0
+
+        for edge in edges:
+            from_key, to_key = edge[0], edge[1]
+            weight = edge[2] if len(edge) > 2 else 1
+
+            # Only look each key up once
+            from_vertex = vertex_list.get(from_key)
+            if from_vertex is None:
+                from_vertex = self.add_vertex(from_key)
+            to_vertex = vertex_list.get(to_key)
+            if to_vertex is None:
+                to_vertex = self.add_vertex(to_key)
+
+            if to_vertex not in from_vertex.neighbors:
+                new_edges += 1
+            from_vertex.neighbors[to_vertex] = weight
+            if not directed:
+                to_vertex.neighbors[from_vertex] = weight
+            else:
+                if to_vertex.in_neighbors is None:
+                    to_vertex.in_neighbors = {}
+                to_vertex.in_neighbors[from_vertex] = weight
+
+            if weight != 1:
+                weighted = True
+            count += 1
+
+        self.weighted = weighted
+        self.edge_count += new_edges
+        if count > 0:
+            self.version += 1
+            # Relabel the components in one pass when they are next needed,
+            # rather than paying for a union on every edge
+            self._components_stale = True
+        return count
+
+    def connected(self, from_key, to_key):
+        """Return True if the two vertices are in the same (weakly) connected component."""
+        return self._component_forest().connected(self.get_vertex(from_key), self.get_vertex(to_key))
+
+    def component_of(self, key):
+        """Return the vertex representing the (weakly) connected component of a vertex."""
+        return self._component_forest().find(self.get_vertex(key))
+
+    def components(self):
+        """Return every (weakly) connected component as a set of vertices."""
+        return self._component_forest().sets()
+
+    @property
+    def num_components(self):
+        """Return the number of (weakly) connected components."""
+        return self._component_forest().count
+
+    def _component_forest(self, exact=True):
+        '''Return the union-find of the components, relabeling it first if it is stale
+
+        exact: when False, a forest that may still join components split
+        by removals is good enough. Vertices it keeps apart are still
+        never connected, which is all a search needs to skip itself.
+        The forest is still relabeled once it holds more removed vertices
+        than live ones, so it doesn't grow under churn.
+        '''
+        if (self._components_stale or (exact and self._components_split)
+                or self._removed_vertices > self.num_vertices):
+            forest = DisjointSet()
+            parent, rank = forest.parent, forest.rank
+            for vertex in self.vertex_list.values():
+                if vertex in parent:
+                    continue
+                # Point everything reachable, ignoring direction, at this root
+                parent[vertex] = vertex
+                rank[vertex] = 0
+                forest.count += 1
+                stack = [vertex]
+                while len(stack) > 0:
+                    u = stack.pop()
+                    for neighbors in (u.iter_neighbors(), u.iter_in_neighbors()):
+                        for v in neighbors:
+                            if v not in parent:
+                                parent[v] = vertex
+                                rank[v] = 0
+                                rank[vertex] = 1
+                                stack.append(v)
+            self._components = forest
+            self._components_stale = False
+            self._components_split = False
+            self._removed_vertices = 0
+        return self._components
 
     def get_vertices(self):
         """return all the vertices in the graph"""
+        if self.stats is not None:
+            self.stats.sets_allocated += 1
         return set(self.vertex_list.values())
 
     def get_edge_list(self):
         '''Return a list of edges'''
-        edge_list = set()
-
-        for from_vertex in self.get_vertices():
-            for to_vertex in from_vertex.get_neighbors():
-                # If weighted, store the edge weight in the graph
-                if self.weighted:
-                    weight = from_vertex.neighbors[to_vertex]
-
-                # If the graph is directed
-                if self.directed and self.weighted:
-                    edge_list.add((from_vertex.id, to_vertex.id, weight))
-                if self.directed and not self.weighted:
-                    edge_list.add((from_vertex.id, to_vertex.id))
-
-                # If the graph is undirected only one edge between two vertices
-                if not self.directed and self.weighted:
-                    if(to_vertex.id, from_vertex.id, weight) not in edge_list:
-                        edge_list.add((from_vertex.id, to_vertex.id, weight))
-                if not self.directed and not self.weighted:
-                    if (to_vertex.id, from_vertex.id) not in edge_list:
-                        edge_list.add((from_vertex.id, to_vertex.id))
-
-        return edge_list
+        return set(self.iter_edges())
+
+    def iter_edges(self):
+        '''Yield every edge once as (from, to) or, if weighted, (from, to, weight)'''
+        weighted = self.weighted
+        directed = self.directed
+
+        for from_vertex in self.vertex_list.values():
+            for to_vertex, weight in from_vertex.neighbors.items():
+                # An undirected edge is stored on both endpoints,
+                # only emit it from the endpoint added first
+                if not directed and to_vertex.index < from_vertex.index:
+                    continue
+                if weighted:
+                    yield (from_vertex.id, to_vertex.id, weight)
+                else:
+                    yield (from_vertex.id, to_vertex.id)
+
+    def out_degrees(self):
+        '''Return an array of the number of out-edges of every vertex, in vertex_list order'''
+        return array('q', (len(vertex.neighbors) for vertex in self.vertex_list.values()))
+
+    def in_degrees(self):
+        '''Return an array of the number of in-edges of every vertex, in vertex_list order'''
+        if not self.directed:
+            return self.out_degrees()
+        return array('q', (len(vertex.iter_in_neighbors()) for vertex in self.vertex_list.values()))
+
+    def freeze(self):
+        '''Return an immutable CSR snapshot of the graph'''
+        # Map every vertex to a dense int id in insertion order
+        vertices = list(self.vertex_list.values())
+        ids = {vertex: i for i, vertex in enumerate(vertices)}
+
+        # Store integer weights as ints and anything else as floats
+        weight_type = 'q'
+        for vertex in vertices:
+            if not all(isinstance(w, int) for w in vertex.neighbors.values()):
+                weight_type = 'd'
+                break
+
+        offsets = array('q', [0])
+        targets = array('q')
+        weights = array(weight_type)
+        for vertex in vertices:
+            # Sort every row by id so rows can be merged and intersected
+            row = sorted((ids[v], w) for v, w in vertex.neighbors.items())
+            targets.extend(v for v, _ in row)
+            weights.extend(w for _, w in row)
+            offsets.append(len(targets))
+
+        return FrozenGraph([vertex.id for vertex in vertices], offsets, targets, weights,
+                           directed=self.directed, weighted=self.weighted)
 
+    def multi_source_distances(self, sources):
+        '''Return one array of BFS distances per source key, -1 where unreachable
+
+        Entries follow the order of vertex_list, see FrozenGraph.multi_source_distances.
+        '''
+        return self.freeze().multi_source_distances(sources)
+
+    def save_binary(self, path):
+        '''Save a CSR snapshot of the graph that frozen_graph.load_binary can memory-map'''
+        self.freeze().save(path)
+
+    @_timed
     def breadth_first_search(self, vertex, n, new=True):
         '''Implementation of BFS to Find vertices n edges'''
 
@@ -159,9 +662,13 @@ class Graph:
             raise TypeError('vertex must be an instance of Vertex')
         
         # Raise error if vertex not found
-        if vertex not in self.get_vertices():
+        if self.vertex_list.get(vertex.id) is not vertex:
             raise ValueError(f'{vertex} is not in the graph')
 
+        # Serve or extend the levels cached for this vertex
+        if new and self.bfs_cache is not None:
+            return self._cached_level(vertex, n)
+
         # Only vertices at level n
         if new:
             # Keeps track of the vertices that already been visited
@@ -181,18 +688,16 @@ class Graph:
             # Queue vertices if has not been visited
             if new:
                 # go through removed vertex's neighbor
-                for v in remove_vertex.get_neighbors():
+                for v in remove_vertex.iter_neighbors():
                     # if has not been visited
                     if v not in visit:
-                        # Set the parent
-                        v.parent = remove_vertex
                         # add to the back of deque
                         vertex_deque.append(v)
                         # mark v as visit
                         visit.add(v)
             else:
                 # add all vertices that v has access to back of the deque
-                vertex_deque.extend(remove_vertex.get_neighbors())
+                vertex_deque.extend(remove_vertex.iter_neighbors())
 
             # Decrese one after removing vertex
             still_in_deque -= 1
@@ -203,6 +708,11 @@ class Graph:
                 # Vertices that can be reach from this level
                 still_in_deque = len(vertex_deque)
                 
+        if self.stats is not None:
+            # One set for the result and one for the visited vertices
+            self.stats.sets_allocated += 2 if new else 1
+            if new:
+                self._record_traversal(visit, vertex_deque)
 
         # If there's no more levels
         if level_counter < n:
@@ -213,7 +723,18 @@ class Graph:
         return set(vertex_deque)
 
 
-    def find_shortest_path(self, start, end):
+    def _cached_level(self, vertex, n):
+        '''Return level n from the cached BFS levels of vertex, computing only new levels'''
+        cache = self.bfs_cache
+        cache.validate(self.version)
+        levels = cache.get(vertex)
+        if levels is None:
+            levels = _BFSLevels(vertex)
+            cache.put(vertex, levels)
+        return levels.level(n)
+
+    @_timed
+    def find_shortest_path(self, start, end, bidirectional=False):
         '''Find the shortest path betwen two vertices'''
         # Raise error if not found
         if start not in self.vertex_list:
@@ -225,105 +746,374 @@ class Graph:
         start_vertex = self.vertex_list[start]
         end_vertex = self.vertex_list[end]
 
-        # Get vertices one edge away from starting vertex
-        level = 1
-        vertex_level = self.breadth_first_search(start_vertex, level)
-        
+        # A vertex is zero edges away from itself
+        if start_vertex is end_vertex:
+            return [start_vertex]
+
+        # Vertices in different components can't reach each other
+        if not self._component_forest(exact=False).connected(start_vertex, end_vertex):
+            return None
+
+        if self.path_cache is not None:
+            path = self._cached_path(start_vertex, end_vertex)
+            if path is not _MISSING:
+                return path
+            path = self._search(start_vertex, end_vertex, bidirectional)
+            self._cache_path(start_vertex, end_vertex, path)
+            return path
+
+        return self._search(start_vertex, end_vertex, bidirectional)
 
-        # Loops until there's no level and is the end of the vertex
-        while end_vertex not in vertex_level:
-            # If there are no more vertices
-            if len(vertex_level) == 0:
-                return None
-            # Increase level to get one more edge away from starting vertex
-            level += 1
-            vertex_level = self.breadth_first_search(start_vertex, level)
+    def _search(self, start_vertex, end_vertex, bidirectional=False):
+        '''Return a shortest path between two different vertices, or None'''
+        if bidirectional:
+            return self._bidirectional_search(start_vertex, end_vertex)
 
+        # Maps every discovered vertex to the vertex it was reached from
+        parents = {start_vertex: None}
+        vertex_deque = deque([start_vertex])
+
+        # One BFS pass that stops as soon as the end vertex is discovered
+        while len(vertex_deque) > 0:
+            remove_vertex = vertex_deque.popleft()
+            for v in remove_vertex.iter_neighbors():
+                if v not in parents:
+                    parents[v] = remove_vertex
+                    if v is end_vertex:
+                        if self.stats is not None:
+                            self._record_traversal(parents, vertex_deque, end_vertex)
+                        return self._build_path(parents, end_vertex)
+                    vertex_deque.append(v)
+
+        if self.stats is not None:
+            self._record_traversal(parents, vertex_deque)
+        # The end vertex can't be reached from the start vertex
+        return None
+
+    def _path_key(self, start_vertex, end_vertex):
+        '''Return the cache key of a path, shared by both directions when undirected'''
+        if not self.directed and end_vertex.index < start_vertex.index:
+            return (end_vertex, start_vertex)
+        return (start_vertex, end_vertex)
+
+    def _cached_path(self, start_vertex, end_vertex):
+        '''Return the cached path from start_vertex to end_vertex, or _MISSING'''
+        cache = self.path_cache
+        cache.validate(self.version)
+        entry = cache.get(self._path_key(start_vertex, end_vertex), _MISSING)
+        if entry is _MISSING or entry is None:
+            return entry
+        # The entry is the first end + 1 vertices of a cached path
+        path, end = entry
+        if path[0] is start_vertex:
+            return list(path[:end + 1])
+        # An undirected path walked the other way
+        return list(reversed(path[:end + 1]))
+
+    def _cache_path(self, start_vertex, end_vertex, path):
+        '''Cache a path and every prefix of it, since those are shortest paths too'''
+        cache = self.path_cache
+        if path is None:
+            cache.put(self._path_key(start_vertex, end_vertex), None)
+            return
+        path = tuple(path)
+        for end in range(1, len(path)):
+            cache.put(self._path_key(start_vertex, path[end]), (path, end))
+
+    def _record_traversal(self, discovered, remaining, undequeued=None):
+        '''Count the vertices a search dequeued and the edges it scanned from them'''
+        # Only runs with instrumentation on, so the searches
+        # themselves don't pay for counting
+        remaining = set(remaining)
+        remaining.add(undequeued)
+        dequeued = [v for v in discovered if v not in remaining]
+        self.stats.vertices_dequeued += len(dequeued)
+        self.stats.edges_scanned += sum(len(v.neighbors) for v in dequeued)
+
+    def find_weighted_shortest_path(self, start, end, heuristic=None):
+        '''Find the lowest weight path between two vertices with Dijkstra, or A* given a heuristic
+
+        heuristic(key, end_key) must never overestimate the remaining
+        weight and must be consistent, like a straight-line distance.
+        '''
+        # Raise error if not found
+        if start not in self.vertex_list:
+            raise KeyError(f'Vertex {start} is not in the Graph')
+        if end not in self.vertex_list:
+            raise KeyError(f'Vertex {end} is not in the graph')
+
+        end_vertex = self.vertex_list[end]
+        if not self._component_forest(exact=False).connected(self.vertex_list[start], end_vertex):
+            return None
+        distances, parents = self._dijkstra(self.vertex_list[start], end_vertex, heuristic)
+        if end_vertex not in parents:
+            return None
+        return self._build_path(parents, end_vertex)
+
+    def shortest_distances(self, start):
+        '''Return a dictionary of every vertex reachable from start to its weighted distance'''
+        if start not in self.vertex_list:
+            raise KeyError(f'Vertex {start} is not in the Graph')
+
+        distances, _ = self._dijkstra(self.vertex_list[start])
+        return distances
+
+    def _dijkstra(self, start_vertex, end_vertex=None, heuristic=None):
+        '''Binary heap Dijkstra from start_vertex, stopping early once end_vertex is settled'''
+        distances = {start_vertex: 0}
+        parents = {start_vertex: None}
+        settled = set()
+        # The counter breaks ties so vertices are never compared
+        counter = count()
+        heap = [(0, next(counter), start_vertex)]
+
+        while len(heap) > 0:
+            _, _, u = heappop(heap)
+            # Skip stale heap entries
+            if u in settled:
+                continue
+            if u is end_vertex:
+                break
+            settled.add(u)
+
+            for v, weight in u.neighbors.items():
+                if weight < 0:
+                    raise ValueError(f'Edge {u.id} -> {v.id} has a negative weight')
+                distance = distances[u] + weight
+                if v not in distances or distance < distances[v]:
+                    distances[v] = distance
+                    parents[v] = u
+                    # A* orders the heap by distance plus the estimate left to go
+                    if heuristic is not None:
+                        heappush(heap, (distance + heuristic(v.id, end_vertex.id), next(counter), v))
+                    else:
+                        heappush(heap, (distance, next(counter), v))
+
+        return distances, parents
+
+    def shortest_paths_concurrent(self, pairs, workers=4):
+        '''Answer many (start, end) shortest path queries on a thread pool'''
+        # Every query keeps its traversal state to itself, so the
+        # graph is shared read-only between the worker threads
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self.find_shortest_path, start, end)
+                       for start, end in pairs]
+            # Return the paths in the same order as the pairs
+            return [future.result() for future in futures]
+
+    def _build_path(self, parents, end_vertex):
+        '''Follow parents back from end_vertex and return the path in order'''
         # Create a path list and ending vertex
         path = [end_vertex]
-        parent = end_vertex
-        while start_vertex != parent:
+        parent = parents[end_vertex]
+        while parent is not None:
             # Move to the current vertex's parent and add it to path
-            parent = parent.parent
             path.append(parent)
+            parent = parents[parent]
 
         # Reverse the path
-        path[:] = reversed(path)
+        path.reverse()
+        return path
+
+    def _bidirectional_search(self, start_vertex, end_vertex):
+        '''Search from both ends at once and join the two halves of the path'''
+        # Parents point toward the start on the forward side
+        # and toward the end on the backward side
+        forward, backward = {start_vertex: None}, {end_vertex: None}
+        forward_depth, backward_depth = {start_vertex: 0}, {end_vertex: 0}
+        forward_frontier, backward_frontier = [start_vertex], [end_vertex]
+
+        while len(forward_frontier) > 0 and len(backward_frontier) > 0:
+            # Always grow the smaller frontier by one full level
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meet = self._expand_level(
+                    forward_frontier, forward, forward_depth, backward_depth, False)
+                if meet is not None:
+                    tail, head = meet
+                    return self._join_paths(forward, backward, tail, head)
+            else:
+                backward_frontier, meet = self._expand_level(
+                    backward_frontier, backward, backward_depth, forward_depth, True)
+                if meet is not None:
+                    head, tail = meet
+                    return self._join_paths(forward, backward, tail, head)
+
+        # The two searches never met
+        return None
+
+    def _expand_level(self, frontier, parents, depth, other_depth, backward):
+        '''Expand one BFS level and return the next frontier and the best meeting edge'''
+        next_frontier = []
+        meet = None
+        meet_length = None
+        if self.stats is not None:
+            self.stats.vertices_dequeued += len(frontier)
+            self.stats.edges_scanned += sum(
+                len(u.in_neighbors or ()) if backward and self.directed else len(u.neighbors)
+                for u in frontier)
+
+        for u in frontier:
+            # Walk in-edges when searching backward on a directed graph
+            if backward and self.directed:
+                neighbors = u.iter_in_neighbors()
+            else:
+                neighbors = u.iter_neighbors()
+            for v in neighbors:
+                # Keep the shortest path through any edge into the other side
+                if v in other_depth:
+                    length = depth[u] + 1 + other_depth[v]
+                    if meet_length is None or length < meet_length:
+                        meet, meet_length = (u, v), length
+                if v not in parents:
+                    parents[v] = u
+                    depth[v] = depth[u] + 1
+                    next_frontier.append(v)
+
+        return next_frontier, meet
+
+    def _join_paths(self, forward, backward, tail, head):
+        '''Join the forward path ending at tail with the backward path starting at head'''
+        path = self._build_path(forward, tail)
+        while head is not None:
+            path.append(head)
+            head = backward[head]
         return path
     
-    def depth_first_search(self, start, end, visit = [], path=[]):
-        # Set start and end 
-        start_vertex = self.vertex_list[start]
-        end_vertex = self.vertex_list[end]
-        visit += [start_vertex]
-
-        print(f'Neighbors of {start_vertex.id}: ', start_vertex.get_neighbors())
-        for neighbor in start_vertex.get_neighbors():
-            if neighbor is end_vertex: 
-                for nbr in neighbor.get_neighbors():
-                    if nbr in end_vertex.get_neighbors() and nbr not in visit and nbr in start_vertex.get_neighbors():
-                        visit += [nbr]
-                if end_vertex not in visit:
-                    visit += [end_vertex]
-                return visit
-            
-            if neighbor not in visit:
-                # print(f'Neighbors of {neighbor.id}: ', neighbor.get_neighbors()) 
-                if neighbor in end_vertex.neighbors:
-                    parent = neighbor
-                    print('Parent: ', parent)
-                    visit = self.depth_first_search(neighbor.id, end_vertex.id)
-
-        return visit
-    
+    def iter_depth_first(self, start, order='pre'):
+        '''Yield the vertices reachable from start in depth-first pre-order or post-order'''
+        if start not in self.vertex_list:
+            raise KeyError(f'Vertex {start} is not in the Graph')
+        if order not in ('pre', 'post'):
+            raise ValueError(f"order must be 'pre' or 'post', not {order!r}")
 
-    def read_graph_from_file(self, file_name):
-        '''Read graph from a file'''
-        file = open(file_name, 'r') 
-        file_list = file.readlines()
-        vertices = file_list[1].rstrip().split(',')
-        valid_types = 'gGdD'
-        graph_type = ''
-        directed = False
-        weighted = False
-        edges_list = []
-
-        # Checks for valid types
-        if file_list[0].rstrip() in valid_types:
-            graph_type = file_list[0].rstrip().upper()
-        else:
-            raise ValueError('G or D is not specified')
-        # Checks if graph id directed
-        print("Graph Type: ", graph_type)
-        if graph_type == 'D':
-            directed = True
-            print(directed)
-        # Checks if graph is weighted
-        for item in range(2, len(file_list)):
-            edge = file_list[item].rstrip().replace('(', '').replace(')', '').split(',')
-            if len(edge) == 3:
-                weighted = True
-            edges_list.append(edge)
-        # Sets the type of the graph 
-        if self.num_vertices == 0:
-            self.weighted = weighted
-            self.directed = directed
-        # Add vertices to the graph
-        for vertex in vertices:
-            if isinstance(vertex, int):
-                self.add_vertex(int(vertex))
+        start_vertex = self.vertex_list[start]
+        # Keeps track of the vertices that already been visited
+        visit = {start_vertex}
+        if order == 'pre':
+            yield start_vertex
+        # Each entry holds a vertex and where its neighbor scan left off
+        stack = [(start_vertex, iter(start_vertex.iter_neighbors()))]
+
+        while len(stack) > 0:
+            vertex, neighbors = stack[-1]
+            for neighbor in neighbors:
+                if neighbor not in visit:
+                    visit.add(neighbor)
+                    if order == 'pre':
+                        yield neighbor
+                    # Go deeper before finishing this vertex's neighbors
+                    stack.append((neighbor, iter(neighbor.iter_neighbors())))
+                    break
             else:
-                self.add_vertex(str(vertex))
+                # Every neighbor is done, so is this vertex
+                stack.pop()
+                if order == 'post':
+                    yield vertex
 
-        for edge in edges_list:
-            if weighted:
-                self.add_edge(int(edge[0]), int(edge[1]), int(edge[2]))
+    def depth_first_search(self, start, end):
+        '''Return a path from start to end found by depth-first search, or None'''
+        if start not in self.vertex_list:
+            raise KeyError(f'Vertex {start} is not in the Graph')
+        if end not in self.vertex_list:
+            raise KeyError(f'Vertex {end} is not in the graph')
+
+        start_vertex = self.vertex_list[start]
+        end_vertex = self.vertex_list[end]
+        if start_vertex is end_vertex:
+            return [start_vertex]
+
+        visit = {start_vertex}
+        stack = [(start_vertex, iter(start_vertex.iter_neighbors()))]
+        while len(stack) > 0:
+            vertex, neighbors = stack[-1]
+            for neighbor in neighbors:
+                if neighbor not in visit:
+                    # The stack holds the path from start to this vertex
+                    if neighbor is end_vertex:
+                        return [v for v, _ in stack] + [end_vertex]
+                    visit.add(neighbor)
+                    stack.append((neighbor, iter(neighbor.iter_neighbors())))
+                    break
             else:
-                if isinstance(vertex, int):
-                    self.add_edge(int(edge[0]), int(edge[1]))
-                else:
-                    self.add_edge(str(edge[0]), str(edge[1]))
+                stack.pop()
 
+        return None
+
+    def recommend(self, key, top_k=10, metric='common_neighbors'):
+        '''Return up to top_k (vertex, score) pairs of vertices two edges away from key, best first
+
+        metric: 'common_neighbors' counts the neighbors the two share,
+        'jaccard' divides that by the neighbors of either, and
+        'adamic_adar' weighs each shared neighbor by 1 / log(degree).
+        On directed graphs a shared neighbor is one key has an edge to
+        and that has an edge to the candidate.
+        '''
+        if key not in self.vertex_list:
+            raise KeyError(f'Vertex {key} is not in the Graph')
+        if metric not in RECOMMEND_METRICS:
+            raise ValueError(f'metric must be one of {RECOMMEND_METRICS}, not {metric!r}')
+
+        vertex = self.vertex_list[key]
+        friends = vertex.neighbors
+        # Count every candidate once per shared neighbor
+        scores = {}
+        for neighbor in vertex.iter_neighbors():
+            if neighbor is vertex:
+                continue
+            if metric == 'adamic_adar':
+                degree = len(neighbor.neighbors) + len(neighbor.iter_in_neighbors())
+                # Only the edge to vertex, no candidates behind it
+                if degree < 2:
+                    continue
+                weight = 1 / math.log(degree)
+            else:
+                weight = 1
+            for candidate in neighbor.iter_neighbors():
+                if candidate is not vertex and candidate not in friends:
+                    scores[candidate] = scores.get(candidate, 0) + weight
+
+        if metric == 'jaccard':
+            for candidate, common in scores.items():
+                # On directed graphs, compare with who follows the candidate
+                followers = candidate.in_neighbors if self.directed else candidate.neighbors
+                scores[candidate] = common / (len(friends) + len(followers) - common)
+        # Ties go to the vertex added first
+        return nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0].index))
+
+    def recommend_all(self, top_k=10, metric='common_neighbors', processes=None):
+        '''Return a dictionary of every vertex to its recommend list, see FrozenGraph.recommend_all'''
+        vertex_list = self.vertex_list
+        recommendations = self.freeze().recommend_all(top_k, metric, processes)
+        return {vertex_list[key]: [(vertex_list[other], score) for other, score in row]
+                for key, row in recommendations.items()}
+
+    @_timed
+    def read_graph_from_file(self, file_name):
+        '''Stream a graph from a G/D edge list file and return the number of edges read'''
+        with open(file_name, 'r') as file:
+            # Checks for valid types
+            graph_type = file.readline().strip().upper()
+            if graph_type not in ('G', 'D'):
+                raise ValueError('G or D is not specified')
+            vertices = file.readline().rstrip().split(',')
+
+            # Sets the type of the graph
+            if self.num_vertices == 0:
+                self.directed = graph_type == 'D'
+                self.weighted = False
+            # Add vertices to the graph
+            for vertex in vertices:
+                self.add_vertex(vertex)
+
+            # The file is read one buffered line at a time,
+            # so memory stays bounded however long it is
+            count = self.add_edges(_parse_edge(line) for line in file if not line.isspace())
+
+        if self.stats is not None:
+            self.stats.edges_read += count
+        return count
+
+    @_timed
     def find_maximal_clique(self):
         """Return a maximal clique of a given vertex."""
         # Set the vertex parameter to randomly selected vertex
@@ -335,15 +1125,17 @@ class Graph:
 
         # Initialize clique as a set of vertices
         clique = set([vertex])
+        if self.stats is not None:
+            self.stats.sets_allocated += 1
 
         # Clique members must be neighor of vertex parameter
-        for neighor in vertex.get_neighbors():
+        for neighor in vertex.iter_neighbors():
             # Keep track of clique memebers that are adjacent to neighor
             counter = 0
             # Check each clique member if it is adjacent to current neighor
             for member in clique:
                 # If the current neighor is not adjacent to this clique member
-                if neighor not in member.get_neighbors():
+                if neighor not in member.iter_neighbors():
                     # Break out of this loop, and move to next neighor
                     break
                 # If it is, increase the count of adjacent clique members
@@ -358,6 +1150,50 @@ class Graph:
 
         # After all neighors checked, return the clique
         return clique
+
+    def iter_maximal_cliques(self, processes=None):
+        """Yield every maximal clique of the graph as a set of vertices.
+
+        Edge direction is ignored. With processes set, the top-level
+        branches of the search are split across a process pool.
+        """
+        adjacency = self._undirected_adjacency()
+        # Each top-level branch only extends cliques with later vertices
+        # of the degeneracy order, so every candidate set stays small
+        order = _degeneracy_order(adjacency)
+        position = {key: i for i, key in enumerate(order)}
+        branches = []
+        for key in order:
+            later = {u for u in adjacency[key] if position[u] > position[key]}
+            branches.append((key, later, adjacency[key] - later))
+
+        if processes is None:
+            for key, candidates, excluded in branches:
+                for clique in _bron_kerbosch({key}, candidates, excluded, adjacency):
+                    yield {self.vertex_list[k] for k in clique}
+            return
+
+        with ProcessPoolExecutor(processes, initializer=_init_clique_worker,
+                                 initargs=(adjacency,)) as executor:
+            chunk_size = max(1, len(branches) // (processes * 4))
+            for cliques in executor.map(_clique_branch, branches, chunksize=chunk_size):
+                for clique in cliques:
+                    yield {self.vertex_list[k] for k in clique}
+
+    def find_maximum_clique(self, processes=None):
+        """Return a largest clique of the graph as a set of vertices."""
+        return max(self.iter_maximal_cliques(processes), key=len, default=set())
+
+    def _undirected_adjacency(self):
+        '''Return a dictionary of each key to the set of keys it shares an edge with'''
+        adjacency = {key: set() for key in self.vertex_list}
+        for vertex in self.vertex_list.values():
+            for neighbor in vertex.iter_neighbors():
+                # Self loops can't be part of a clique
+                if neighbor is not vertex:
+                    adjacency[vertex.id].add(neighbor.id)
+                    adjacency[neighbor.id].add(vertex.id)
+        return adjacency
         
         
         
@@ -0,0 +1,352 @@
+#!python
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import random
+
+
+""" Graph analytics
+Whole-graph measures computed over the CSR arrays of a FrozenGraph.
+Every function takes a Graph, which is frozen first, or a FrozenGraph,
+and returns results keyed by vertex key.
+
+    graph = Graph()
+    graph.read_graph_from_file('graph_data.txt')
+    count_triangles(graph)
+    clustering_coefficients(graph, processes=4)
+
+Triangles and clustering look at the underlying simple undirected
+graph: edge directions, duplicates and self loops are ignored.
+PageRank, closeness and betweenness follow edge directions and ignore
+weights.
+"""
+
+
+def triangle_counts(graph, processes=None):
+    '''Return a dictionary of every key to the number of triangles through that vertex
+
+    processes: split the vertices into ranges counted by that many
+    worker processes.
+    '''
+    frozen = _frozen(graph)
+    _, counts = _triangles(frozen, processes)
+    return dict(zip(frozen.keys, counts))
+
+
+def count_triangles(graph, processes=None):
+    '''Return the number of triangles in the graph'''
+    _, counts = _triangles(_frozen(graph), processes)
+    # Every triangle is counted at each of its three corners
+    return sum(counts) // 3
+
+
+def clustering_coefficients(graph, processes=None):
+    '''Return a dictionary of every key to its local clustering coefficient
+
+    The fraction of pairs of neighbors that are neighbors themselves,
+    0 for vertices with fewer than two neighbors.
+    '''
+    frozen = _frozen(graph)
+    degrees, counts = _triangles(frozen, processes)
+    return dict(zip(frozen.keys, _clustering(degrees, counts)))
+
+
+def average_clustering(graph, processes=None):
+    '''Return the mean local clustering coefficient over every vertex'''
+    frozen = _frozen(graph)
+    if frozen.num_vertices == 0:
+        return 0.0
+    degrees, counts = _triangles(frozen, processes)
+    return sum(_clustering(degrees, counts)) / frozen.num_vertices
+
+
+def pagerank(graph, damping=0.85, tol=1e-6, max_iter=100, initial=None):
+    '''Return a dictionary of every key to its PageRank, summing to 1
+
+    Power iteration pulling rank along the in-edges of every vertex.
+    Vertices without out-edges spread their rank over every vertex.
+    Stops once the total change of an iteration is below tol per
+    vertex, or after max_iter iterations.
+
+    initial: a previous result to start from, so a few edges added
+    since converge in a few iterations. New vertices start at 1 / n.
+    '''
+    frozen = _frozen(graph)
+    n = frozen.num_vertices
+    if n == 0:
+        return {}
+    offsets, in_offsets = frozen.offsets, frozen.in_offsets
+    sources = memoryview(frozen.in_sources)
+
+    # Each vertex gives an equal share of its rank to every out-neighbor
+    share = [0.0] * n
+    dangling = []
+    for u in range(n):
+        degree = offsets[u + 1] - offsets[u]
+        if degree > 0:
+            share[u] = 1 / degree
+        else:
+            dangling.append(u)
+
+    if initial is None:
+        rank = [1 / n] * n
+    else:
+        rank = [initial.get(key, 1 / n) for key in frozen.keys]
+        total = sum(rank)
+        rank = [r / total for r in rank]
+
+    for _ in range(max_iter):
+        given = [r * s for r, s in zip(rank, share)].__getitem__
+        # Teleports plus the rank of dangling vertices, spread evenly
+        base = (1 - damping + damping * sum(rank[u] for u in dangling)) / n
+        next_rank = [base + damping * sum(map(given, sources[in_offsets[v]:in_offsets[v + 1]]))
+                     for v in range(n)]
+        change = sum(abs(a - b) for a, b in zip(next_rank, rank))
+        rank = next_rank
+        if change < n * tol:
+            break
+    return dict(zip(frozen.keys, rank))
+
+
+def closeness_centrality(graph, samples=None, seed=None):
+    '''Return a dictionary of every key to its closeness centrality
+
+    The reciprocal of the mean hop distance to a vertex from the
+    vertices that reach it, scaled by the fraction that do, so vertices
+    in small components don't score high.
+
+    samples: estimate the distances from that many random sources
+    instead of every vertex, trading accuracy for a search per sample.
+    '''
+    frozen = _frozen(graph)
+    n = frozen.num_vertices
+    sources = list(range(n))
+    if samples is not None and samples < n:
+        sources = random.Random(seed).sample(sources, samples)
+
+    totals = array('q', [0]) * n
+    reached = array('q', [0]) * n
+    keys = frozen.keys
+    block_size = 1024
+    # Search in blocks so only one block of distance arrays is alive
+    for first in range(0, len(sources), block_size):
+        block = [keys[i] for i in sources[first:first + block_size]]
+        for distances in frozen.multi_source_distances(block, block_size):
+            for v, distance in enumerate(distances):
+                if distance > 0:
+                    totals[v] += distance
+                    reached[v] += 1
+
+    sources = set(sources)
+    closeness = {}
+    for v in range(n):
+        # Other sampled vertices, v is never a source of its own distance
+        others = len(sources) - (1 if v in sources else 0)
+        if totals[v] == 0 or others == 0:
+            closeness[keys[v]] = 0.0
+        else:
+            closeness[keys[v]] = reached[v] / totals[v] * reached[v] / others
+    return closeness
+
+
+def betweenness_centrality(graph, samples=None, seed=None, processes=None, normalized=True):
+    '''Return a dictionary of every key to its betweenness centrality
+
+    Brandes' algorithm: one BFS per source counts the shortest paths to
+    every vertex, then walking back up the BFS order accumulates how
+    much of each vertex's paths run through its predecessors.
+
+    samples: use that many random sources and scale the sums up to an
+    estimate of the exact scores.
+    processes: split the sources across that many worker processes
+    and add up their partial scores.
+    normalized: divide by the number of pairs of other vertices.
+    '''
+    frozen = _frozen(graph)
+    n = frozen.num_vertices
+    sources = list(range(n))
+    if samples is not None and samples < n:
+        sources = random.Random(seed).sample(sources, samples)
+
+    if processes is None or processes <= 1 or len(sources) < 2:
+        scores = _brandes(frozen, sources)
+    else:
+        step = -(-len(sources) // processes)
+        chunks = [sources[i:i + step] for i in range(0, len(sources), step)]
+        scores = [0.0] * n
+        with ProcessPoolExecutor(processes, initializer=_init_betweenness_worker,
+                                 initargs=(frozen,)) as executor:
+            for partial in executor.map(_brandes_chunk, chunks):
+                for v, score in enumerate(partial):
+                    scores[v] += score
+
+    scale = n / len(sources) if len(sources) > 0 else 1.0
+    if normalized:
+        scale *= 1 / ((n - 1) * (n - 2)) if n > 2 else 1.0
+    elif not frozen.directed:
+        # Both directions of every undirected pair were counted
+        scale *= 0.5
+    return {key: score * scale for key, score in zip(frozen.keys, scores)}
+
+
+def _brandes(frozen, sources):
+    '''Return the summed path dependencies of every id on the given source ids'''
+    n = frozen.num_vertices
+    offsets, targets = frozen.offsets, memoryview(frozen.targets)
+    in_offsets, in_sources = frozen.in_offsets, memoryview(frozen.in_sources)
+    scores = [0.0] * n
+
+    for s in sources:
+        depth = [-1] * n
+        paths = [0] * n
+        depth[s] = 0
+        paths[s] = 1
+        # The BFS queue doubles as the order to walk back in
+        order = [s]
+        i = 0
+        while i < len(order):
+            v = order[i]
+            i += 1
+            next_depth = depth[v] + 1
+            for w in targets[offsets[v]:offsets[v + 1]]:
+                if depth[w] < 0:
+                    depth[w] = next_depth
+                    order.append(w)
+                if depth[w] == next_depth:
+                    paths[w] += paths[v]
+
+        # Predecessors are the in-neighbors one level up, so no lists of
+        # them are kept during the search
+        dependency = [0.0] * n
+        for w in reversed(order):
+            previous_depth = depth[w] - 1
+            share = (1 + dependency[w]) / paths[w]
+            for v in in_sources[in_offsets[w]:in_offsets[w + 1]]:
+                if depth[v] == previous_depth:
+                    dependency[v] += paths[v] * share
+            if w != s:
+                scores[w] += dependency[w]
+    return scores
+
+
+# The snapshot of a betweenness worker process
+_betweenness_graph = None
+
+
+def _init_betweenness_worker(frozen):
+    '''Store the snapshot sent to a betweenness worker process'''
+    global _betweenness_graph
+    _betweenness_graph = frozen
+
+
+def _brandes_chunk(sources):
+    '''Return the partial scores of one chunk of sources in a worker process'''
+    return _brandes(_betweenness_graph, sources)
+
+
+def _frozen(graph):
+    '''Return the FrozenGraph of a Graph or FrozenGraph'''
+    return graph.freeze() if hasattr(graph, 'freeze') else graph
+
+
+def _clustering(degrees, counts):
+    '''Yield the local clustering coefficient of every id'''
+    for degree, triangles in zip(degrees, counts):
+        yield 2 * triangles / (degree * (degree - 1)) if degree > 1 else 0.0
+
+
+def _simple_rows(frozen):
+    '''Yield the sorted ids sharing an edge with each id, both directions merged, no self loops'''
+    for u in range(frozen.num_vertices):
+        row = frozen.neighbor_ids(u)
+        if frozen.directed:
+            row = sorted(set(row).union(frozen.in_neighbor_ids(u)))
+        yield [v for v in row if v != u]
+
+
+def _orient(frozen):
+    '''Return (degrees, offsets, targets) of the simple graph with each edge kept once
+
+    Every edge points from its endpoint of lower degree to the higher
+    one, ties broken by id. A triangle then has exactly one corner both
+    other corners are above, and no row is longer than the square root
+    of twice the edge count.
+    '''
+    n = frozen.num_vertices
+    if frozen.directed:
+        rows = list(_simple_rows(frozen))
+        degrees = array('q', map(len, rows))
+    else:
+        rows = None
+        degrees = array('q', [0]) * n
+        for u, row in enumerate(_simple_rows(frozen)):
+            degrees[u] = len(row)
+
+    offsets = array('q', [0])
+    targets = array('q')
+    for u, row in enumerate(rows if rows is not None else _simple_rows(frozen)):
+        degree = degrees[u]
+        # Rows stay sorted by id
+        targets.extend(v for v in row if degrees[v] > degree or (degrees[v] == degree and v > u))
+        offsets.append(len(targets))
+    return degrees, offsets, targets
+
+
+def _triangles(frozen, processes=None):
+    '''Return (degrees, counts): the simple degree and triangle count of every id'''
+    degrees, offsets, targets = _orient(frozen)
+    n = frozen.num_vertices
+    if processes is None or processes <= 1 or n < 2:
+        return degrees, _count_range(offsets, targets, 0, n)
+
+    # Ranges with about the same number of oriented edges
+    ranges = []
+    step = max(1, -(-len(targets) // processes))
+    start = 0
+    for u in range(n):
+        if offsets[u + 1] - offsets[start] >= step:
+            ranges.append((start, u + 1))
+            start = u + 1
+    if start < n:
+        ranges.append((start, n))
+
+    counts = array('q', [0]) * n
+    with ProcessPoolExecutor(processes, initializer=_init_triangle_worker,
+                             initargs=(offsets, targets)) as executor:
+        for partial in executor.map(_count_triangle_range, ranges):
+            for i, count in enumerate(partial):
+                counts[i] += count
+    return degrees, counts
+
+
+def _count_range(offsets, targets, start, stop):
+    '''Count the triangles whose lowest corner is in start..stop-1, per corner id'''
+    counts = array('q', [0]) * (len(offsets) - 1)
+    targets = memoryview(targets)
+    for u in range(start, stop):
+        row = targets[offsets[u]:offsets[u + 1]]
+        if len(row) < 2:
+            continue
+        above = set(row)
+        for v in row:
+            # Corners above both u and v close a triangle u, v, w
+            for w in above.intersection(targets[offsets[v]:offsets[v + 1]]):
+                counts[u] += 1
+                counts[v] += 1
+                counts[w] += 1
+    return counts
+
+
+# The oriented arrays of a triangle worker process
+_triangle_arrays = None
+
+
+def _init_triangle_worker(offsets, targets):
+    '''Store the oriented arrays sent to a triangle worker process'''
+    global _triangle_arrays
+    _triangle_arrays = (offsets, targets)
+
+
+def _count_triangle_range(bounds):
+    '''Count the triangles of one vertex range in a worker process'''
+    offsets, targets = _triangle_arrays
+    return _count_range(offsets, targets, *bounds)
@@ -0,0 +1,173 @@
+#!python
+
+from frozen_graph_test import random_graph
+from graph import Graph
+from graph_analytics import (average_clustering, betweenness_centrality, closeness_centrality,
+                             clustering_coefficients, count_triangles, pagerank, triangle_counts)
+from itertools import combinations
+import random
+import unittest
+
+
+def simple_neighbors(graph):
+    '''Return every key to the set of other keys it shares an edge with, either direction'''
+    neighbors = {vertex.id: set() for vertex in graph}
+    for from_key, to_key, *_ in graph.iter_edges():
+        if from_key != to_key:
+            neighbors[from_key].add(to_key)
+            neighbors[to_key].add(from_key)
+    return neighbors
+
+
+def dense_pagerank(graph, damping=0.85, iterations=200):
+    '''PageRank by plain dense power iteration, the dangling rank spread over every vertex'''
+    vertices = list(graph)
+    n = len(vertices)
+    rank = {vertex: 1 / n for vertex in vertices}
+    for _ in range(iterations):
+        next_rank = {vertex: (1 - damping) / n for vertex in vertices}
+        for vertex in vertices:
+            targets = vertex.get_neighbors() or vertices
+            for target in targets:
+                next_rank[target] += damping * rank[vertex] / len(targets)
+        rank = next_rank
+    return {vertex.id: value for vertex, value in rank.items()}
+
+
+def unweighted_graph(seed, directed, num_vertices=50, num_edges=90):
+    '''Build a sparse random graph with integer keys and no weights'''
+    rand = random.Random(seed)
+    graph = Graph(directed=directed)
+    for key in range(num_vertices):
+        graph.add_vertex(key)
+    edges = set()
+    while len(edges) < num_edges:
+        from_key, to_key = rand.sample(range(num_vertices), 2)
+        if directed or (to_key, from_key) not in edges:
+            edges.add((from_key, to_key))
+    graph.add_edges(edges)
+    return graph
+
+
+class GraphAnalyticsTest(unittest.TestCase):
+
+    def test_triangles(self):
+        graph = Graph(directed=False)
+        graph.add_edges([('A', 'B'), ('B', 'C'), ('C', 'A'), ('C', 'D'), ('D', 'A'), ('D', 'E'),
+                         ('E', 'E')])
+
+        self.assertEqual(triangle_counts(graph), {'A': 2, 'B': 1, 'C': 2, 'D': 1, 'E': 0})
+        assert count_triangles(graph) == 2
+        self.assertEqual(clustering_coefficients(graph),
+                         {'A': 2 / 3, 'B': 1.0, 'C': 2 / 3, 'D': 1 / 3, 'E': 0.0})
+        self.assertAlmostEqual(average_clustering(graph), (2 / 3 + 1 + 2 / 3 + 1 / 3) / 5)
+        assert average_clustering(Graph()) == 0.0
+
+        # Both directions of a directed edge are one undirected edge
+        directed = Graph()
+        directed.add_edges([('A', 'B'), ('B', 'A'), ('B', 'C'), ('A', 'C')])
+        self.assertEqual(triangle_counts(directed.freeze()), {'A': 1, 'B': 1, 'C': 1})
+
+    def test_random_graphs(self):
+        for directed in (True, False):
+            graph = random_graph(26, directed, num_vertices=60, num_edges=400)
+            neighbors = simple_neighbors(graph)
+            expected = {key: sum(1 for a, b in combinations(row, 2) if b in neighbors[a])
+                        for key, row in neighbors.items()}
+
+            self.assertEqual(triangle_counts(graph), expected)
+            self.assertEqual(triangle_counts(graph, processes=2), expected)
+            self.assertEqual(count_triangles(graph, processes=3), sum(expected.values()) // 3)
+            coefficients = clustering_coefficients(graph)
+            for key, row in neighbors.items():
+                pairs = len(row) * (len(row) - 1) / 2
+                self.assertAlmostEqual(coefficients[key], expected[key] / pairs if pairs else 0.0)
+
+    def test_pagerank(self):
+        for directed in (True, False):
+            graph = unweighted_graph(27, directed)
+            # A dangling vertex
+            graph.add_edge(0, 'sink')
+            ranks = pagerank(graph, tol=1e-12)
+            self.assertAlmostEqual(sum(ranks.values()), 1.0)
+            for key, value in dense_pagerank(graph).items():
+                self.assertAlmostEqual(ranks[key], value)
+
+            # Warm restart after adding edges and a vertex
+            graph.add_edge(1, 2)
+            graph.add_edge(3, 'new')
+            warm = pagerank(graph, tol=1e-12, initial=ranks)
+            cold = pagerank(graph, tol=1e-12)
+            for key, value in cold.items():
+                self.assertAlmostEqual(warm[key], value)
+        assert pagerank(Graph()) == {}
+
+    def test_closeness_centrality(self):
+        for directed in (True, False):
+            graph = unweighted_graph(28, directed)
+            n = graph.num_vertices
+            closeness = closeness_centrality(graph)
+            for end in range(n):
+                # Hop distances to end from every vertex that reaches it
+                distances = []
+                for start in range(n):
+                    path = graph.find_shortest_path(start, end)
+                    if path is not None and start != end:
+                        distances.append(len(path) - 1)
+                expected = len(distances) / sum(distances) * len(distances) / (n - 1) if distances else 0.0
+                self.assertAlmostEqual(closeness[end], expected)
+
+            # Every vertex sampled is the exact answer
+            self.assertEqual(closeness_centrality(graph.freeze(), samples=n, seed=1), closeness)
+            sampled = closeness_centrality(graph, samples=20, seed=1)
+            assert set(sampled) == set(closeness)
+            assert all(0.0 <= value <= 1.0 for value in sampled.values())
+
+    def test_betweenness_centrality(self):
+        # A path through a broker: B sits on 3 of the pairs, C on 4
+        graph = Graph(directed=False)
+        graph.add_edges([('A', 'B'), ('B', 'C'), ('C', 'D'), ('C', 'E')])
+        self.assertEqual(betweenness_centrality(graph, normalized=False),
+                         {'A': 0.0, 'B': 3.0, 'C': 5.0, 'D': 0.0, 'E': 0.0})
+
+        for directed in (True, False):
+            graph = unweighted_graph(30, directed, num_vertices=40, num_edges=80)
+            n = graph.num_vertices
+            frozen = graph.freeze()
+            # Shortest path counts and hop distances between every pair
+            distances = frozen.multi_source_distances(range(n))
+            paths = [[0] * n for _ in range(n)]
+            for s in range(n):
+                paths[s][s] = 1
+                for v in sorted(range(n), key=distances[s].__getitem__):
+                    for w in frozen.neighbor_ids(v):
+                        if distances[s][w] == distances[s][v] + 1:
+                            paths[s][w] += paths[s][v]
+            expected = [0.0] * n
+            for s in range(n):
+                for t in range(n):
+                    if s == t or distances[s][t] < 0:
+                        continue
+                    for v in range(n):
+                        if v not in (s, t) and distances[s][v] > 0 and distances[v][t] > 0 and \
+                                distances[s][v] + distances[v][t] == distances[s][t]:
+                            expected[v] += paths[s][v] * paths[v][t] / paths[s][t]
+
+            scale = 1 / ((n - 1) * (n - 2))
+            exact = betweenness_centrality(graph)
+            for v in range(n):
+                self.assertAlmostEqual(exact[v], expected[v] * scale)
+            parallel = betweenness_centrality(frozen, processes=2)
+            for v in range(n):
+                self.assertAlmostEqual(parallel[v], exact[v])
+
+            # Sampling every source is exact, fewer give an estimate
+            sampled = betweenness_centrality(frozen, samples=n, seed=2)
+            for v in range(n):
+                self.assertAlmostEqual(sampled[v], exact[v])
+            sampled = betweenness_centrality(frozen, samples=10, seed=2, processes=2)
+            assert set(sampled) == set(exact) and min(sampled.values()) >= 0
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+#!python
+from graph import Graph
+from graph_generators import barabasi_albert_edges, erdos_renyi_edges, grid_edges, write_graph_file
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+""" Graph benchmark runner
+Times Graph operations on seeded synthetic graphs of growing size and
+writes the results as JSON, so runs on two commits can be compared with
+--baseline.
+
+    python graph_benchmark.py --generator ba --max-edges 100000 --output results.json
+"""
+
+
+GENERATORS = ('er', 'ba', 'grid')
+OPERATIONS = ('read_graph_from_file', 'get_edge_list', 'find_shortest_path', 'find_maximal_clique')
+
+
+def generate(generator, num_edges, file_name, seed):
+    '''Write a graph with about num_edges edges to file_name and return (vertices, edges)'''
+    if generator == 'er':
+        # Average degree of 8
+        num_vertices = max(2, num_edges // 4)
+        edges = erdos_renyi_edges(num_vertices, num_edges, seed)
+    elif generator == 'ba':
+        num_vertices = max(5, num_edges // 4 + 4)
+        edges = barabasi_albert_edges(num_vertices, 4, seed)
+    elif generator == 'grid':
+        side = max(2, int(math.sqrt(num_edges / 2)))
+        num_vertices = side * side
+        edges = grid_edges(side, side)
+    else:
+        raise ValueError(f'unknown generator {generator}')
+    return num_vertices, write_graph_file(file_name, num_vertices, edges)
+
+
+def measure(function, memory):
+    '''Return (seconds, peak traced bytes) of one call, tracing memory in a second call'''
+    start = time.perf_counter()
+    function()
+    seconds = time.perf_counter() - start
+
+    peak = None
+    if memory:
+        # Tracing slows Python down, so it never overlaps the timed call
+        tracemalloc.start()
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return seconds, peak
+
+
+def run(generator, sizes, seed=0, queries=20, memory=True, directory=None):
+    '''Benchmark every operation on one graph per size and return the result records'''
+    records = []
+    with tempfile.TemporaryDirectory(dir=directory) as temp:
+        for size in sizes:
+            file_name = os.path.join(temp, f'{generator}_{size}.txt')
+            num_vertices, num_edges = generate(generator, size, file_name, seed)
+
+            def load():
+                graph = Graph()
+                graph.read_graph_from_file(file_name)
+                return graph
+
+            graph = load()
+            rand = random.Random(seed)
+            keys = list(graph.vertex_list)
+            pairs = [(rand.choice(keys), rand.choice(keys)) for _ in range(queries)]
+
+            operations = {
+                'read_graph_from_file': load,
+                'get_edge_list': graph.get_edge_list,
+                'find_shortest_path': lambda: [graph.find_shortest_path(a, b) for a, b in pairs],
+                'find_maximal_clique': lambda: [graph.find_maximal_clique() for _ in range(queries)],
+            }
+            for operation in OPERATIONS:
+                # Seed the random vertex choices of find_maximal_clique
+                random.seed(seed)
+                seconds, peak = measure(operations[operation], memory)
+                calls = queries if operation in ('find_shortest_path', 'find_maximal_clique') else 1
+                records.append({'generator': generator, 'size': size, 'vertices': num_vertices,
+                                'edges': num_edges, 'operation': operation, 'calls': calls,
+                                'seconds': seconds, 'seconds_per_call': seconds / calls,
+                                'peak_bytes': peak})
+    return records
+
+
+def environment():
+    '''Return the details needed to compare results between commits'''
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {'commit': commit, 'python': sys.version.split()[0], 'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z')}
+
+
+def compare(records, baseline):
+    '''Return the lines comparing records with the records of a baseline run'''
+    previous = {(r['generator'], r['size'], r['operation']): r for r in baseline}
+    lines = []
+    for record in records:
+        old = previous.get((record['generator'], record['size'], record['operation']))
+        if old is None or old['seconds'] == 0:
+            continue
+        ratio = record['seconds'] / old['seconds']
+        lines.append(f"{record['generator']:>4} {record['size']:>10} {record['operation']:<22} "
+                     f"{old['seconds']:10.4f}s -> {record['seconds']:10.4f}s  x{ratio:.2f}")
+    return lines
+
+
+def main(argv=None):
+    '''Run the benchmarks from the command line'''
+    parser = argparse.ArgumentParser(description='Benchmark Graph operations on synthetic graphs.')
+    parser.add_argument('--generator', choices=GENERATORS, action='append',
+                        help='graph family to generate, may be repeated (default: all)')
+    parser.add_argument('--min-edges', type=int, default=10 ** 3)
+    parser.add_argument('--max-edges', type=int, default=10 ** 7)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--queries', type=int, default=20, help='queries per timed search operation')
+    parser.add_argument('--no-memory', action='store_true', help='skip the peak memory pass')
+    parser.add_argument('--output', default='bench_output.json')
+    parser.add_argument('--baseline', help='results of an earlier run to compare against')
+    args = parser.parse_args(argv)
+
+    # Sizes grow by powers of ten
+    sizes = []
+    size = args.min_edges
+    while size <= args.max_edges:
+        sizes.append(size)
+        size *= 10
+
+    records = []
+    for generator in args.generator or GENERATORS:
+        for record in run(generator, sizes, args.seed, args.queries, not args.no_memory):
+            line = (f"{record['generator']:>4} {record['size']:>10} {record['operation']:<22} "
+                    f"{record['seconds']:10.4f}s")
+            if record['peak_bytes'] is not None:
+                line += f"  peak {record['peak_bytes']} bytes"
+            print(line)
+            records.append(record)
+
+    with open(args.output, 'w') as file:
+        json.dump({'environment': environment(), 'seed': args.seed, 'results': records}, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['results']
+        print('\n'.join(compare(records, baseline)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!python
+from collections import OrderedDict
+from threading import Lock
+
+
+""" LRUCache Class
+A bounded least-recently-used cache for graph query results.
+
+Entries are tagged with the graph version they were computed against,
+and the whole cache is dropped as soon as the graph version moves on.
+"""
+
+
+class LRUCache(object):
+
+    def __init__(self, capacity=128):
+        """Initialize an empty cache holding at most capacity entries."""
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Queries may run on several threads at once
+        self._lock = Lock()
+
+    def __len__(self):
+        """Return the number of cached entries."""
+        return len(self.entries)
+
+    def validate(self, version):
+        """Drop every entry if they were computed against another graph version."""
+        with self._lock:
+            if self.version != version:
+                if len(self.entries) > 0:
+                    self.invalidations += 1
+                self.entries.clear()
+                self.version = version
+
+    def get(self, key, default=None):
+        """Return the entry for key, marking it most recently used, or default."""
+        with self._lock:
+            if key not in self.entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, value):
+        """Store value under key, evicting the least recently used entry if full."""
+        with self._lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Remove every entry, keeping the statistics."""
+        with self._lock:
+            self.entries.clear()
+
+    @property
+    def hit_rate(self):
+        """Return the fraction of lookups that found an entry."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def stats(self):
+        """Return the cache statistics as a dictionary."""
+        return {'size': len(self.entries), 'capacity': self.capacity,
+                'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate,
+                'evictions': self.evictions, 'invalidations': self.invalidations}
@@ -0,0 +1,37 @@
+#!python
+
+from graph_cache import LRUCache
+import unittest
+
+
+class LRUCacheTest(unittest.TestCase):
+
+    def test_get_put(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        assert cache.get('a') == 1
+        # b is now the least recently used entry
+        cache.put('c', 3)
+        assert cache.get('b') is None
+        assert cache.get('c') == 3
+        assert len(cache) == 2
+        self.assertEqual(cache.stats(), {'size': 2, 'capacity': 2, 'hits': 2, 'misses': 1,
+                                         'hit_rate': 2 / 3, 'evictions': 1, 'invalidations': 0})
+        with self.assertRaises(ValueError):
+            LRUCache(0)
+
+    def test_validate(self):
+        cache = LRUCache()
+        cache.validate(1)
+        cache.put('a', 1)
+        cache.validate(1)
+        assert cache.get('a') == 1
+        # A new graph version drops every entry
+        cache.validate(2)
+        assert cache.get('a') is None
+        assert cache.invalidations == 1
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,8 @@
 from graph import Graph
+from graph_server import GraphServer, send_queries
+import argparse
+import asyncio
+import json
 import sys
 
 def graph_path_data(path):
@@ -40,5 +44,66 @@ def main():
     
     # print(graph.depth_first_search(1, 5))
 
+def serve(argv):
+    '''Load a graph file once and answer queries on a socket until interrupted'''
+    parser = argparse.ArgumentParser(prog='graph_friends.py serve',
+                                     description='Answer graph queries over a local socket.')
+    parser.add_argument('graph_file')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='listen on this Unix socket path instead of TCP')
+    parser.add_argument('--processes', type=int, help='answer queries in worker processes')
+    args = parser.parse_args(argv)
+
+    graph = Graph()
+    graph.read_graph_from_file(args.graph_file)
+    server = GraphServer(graph, processes=args.processes)
+    where = args.unix or f'{args.host}:{args.port}'
+    print(f'Serving {graph.num_vertices} vertices on {where}')
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+def query(argv):
+    '''Send one query to a running server and print the result'''
+    parser = argparse.ArgumentParser(prog='graph_friends.py query',
+                                     description='Query a graph_friends.py server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='connect to this Unix socket path instead of TCP')
+    operations = parser.add_subparsers(dest='op', required=True)
+    path = operations.add_parser('shortest_path')
+    path.add_argument('start')
+    path.add_argument('end')
+    neighbors = operations.add_parser('neighbors')
+    neighbors.add_argument('key')
+    neighbors.add_argument('k', type=int, nargs='?', default=1)
+    recommend = operations.add_parser('recommend')
+    recommend.add_argument('key')
+    recommend.add_argument('--top-k', type=int, default=10)
+    recommend.add_argument('--metric', default='common_neighbors',
+                           choices=('common_neighbors', 'jaccard', 'adamic_adar'))
+    operations.add_parser('clique')
+    args = parser.parse_args(argv)
+
+    request = {'op': args.op}
+    if args.op == 'shortest_path':
+        request.update(start=args.start, end=args.end)
+    elif args.op == 'neighbors':
+        request.update(key=args.key, k=args.k)
+    elif args.op == 'recommend':
+        request.update(key=args.key, top_k=args.top_k, metric=args.metric)
+    response, = send_queries([request], args.host, args.port, args.unix)
+    if 'error' in response:
+        sys.exit(response['error'])
+    print(json.dumps(response['result']))
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # graph_friends.py serve ... / query ..., or the one shot run
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        serve(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == 'query':
+        query(sys.argv[2:])
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,79 @@
+#!python
+import math
+import random
+
+
+""" Synthetic graph generators
+Seeded generators for benchmark graphs. Each one yields (from, to)
+pairs of int vertex keys without building the graph, and
+write_graph_file streams them into the G/D text format read by
+Graph.read_graph_from_file.
+"""
+
+
+def erdos_renyi_edges(num_vertices, num_edges, seed=None):
+    '''Yield the edges of a G(n, p) random graph expecting about num_edges undirected edges'''
+    rand = random.Random(seed)
+    max_edges = num_vertices * (num_vertices - 1) // 2
+    if max_edges == 0:
+        return
+    p = min(1.0, num_edges / max_edges)
+    if p == 0:
+        return
+    # Skip over the pairs that aren't edges with geometric jumps,
+    # so the time is proportional to the edges rather than n squared
+    log_q = math.log(1.0 - p) if p < 1 else None
+    v, w = 1, -1
+    while v < num_vertices:
+        if log_q is None:
+            w += 1
+        else:
+            w += 1 + int(math.log(1.0 - rand.random()) / log_q)
+        while w >= v and v < num_vertices:
+            w -= v
+            v += 1
+        if v < num_vertices:
+            yield (v, w)
+
+
+def barabasi_albert_edges(num_vertices, m, seed=None):
+    '''Yield the edges of a Barabasi-Albert power-law graph where each new vertex adds m edges'''
+    if m < 1 or m >= num_vertices:
+        raise ValueError('m must be at least 1 and less than num_vertices')
+    rand = random.Random(seed)
+    # Every vertex appears once per edge end, so picking from this
+    # list picks vertices in proportion to their degree
+    ends = []
+    targets = list(range(m))
+    for source in range(m, num_vertices):
+        for target in targets:
+            yield (source, target)
+        ends.extend(targets)
+        ends.extend([source] * m)
+        chosen = set()
+        while len(chosen) < m:
+            chosen.add(rand.choice(ends))
+        targets = list(chosen)
+
+
+def grid_edges(rows, columns):
+    '''Yield the edges of a rows x columns grid, vertex r * columns + c at row r, column c'''
+    for row in range(rows):
+        for column in range(columns):
+            vertex = row * columns + column
+            if column + 1 < columns:
+                yield (vertex, vertex + 1)
+            if row + 1 < rows:
+                yield (vertex, vertex + columns)
+
+
+def write_graph_file(file_name, num_vertices, edges, directed=False):
+    '''Write vertices 0..num_vertices-1 and the given edges in the G/D format and return the edge count'''
+    count = 0
+    with open(file_name, 'w') as file:
+        file.write('D\n' if directed else 'G\n')
+        file.write(','.join(map(str, range(num_vertices))) + '\n')
+        for edge in edges:
+            file.write(f'({",".join(map(str, edge))})\n')
+            count += 1
+    return count
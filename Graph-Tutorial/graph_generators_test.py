@@ -0,0 +1,63 @@
+#!python
+
+from graph import Graph
+from graph_generators import barabasi_albert_edges, erdos_renyi_edges, grid_edges, write_graph_file
+import graph_benchmark
+import json
+import os
+import tempfile
+import unittest
+
+
+class GeneratorsTest(unittest.TestCase):
+
+    def test_erdos_renyi_edges(self):
+        edges = list(erdos_renyi_edges(1000, 4000, seed=1))
+        self.assertEqual(edges, list(erdos_renyi_edges(1000, 4000, seed=1)))
+        self.assertNotEqual(edges, list(erdos_renyi_edges(1000, 4000, seed=2)))
+        # Simple graph with about the requested number of edges
+        self.assertEqual(len({frozenset(edge) for edge in edges}), len(edges))
+        assert all(a != b for a, b in edges)
+        assert 3700 < len(edges) < 4300
+        self.assertEqual(len(list(erdos_renyi_edges(5, 100))), 10)
+
+    def test_barabasi_albert_edges(self):
+        edges = list(barabasi_albert_edges(2000, 3, seed=1))
+        self.assertEqual(edges, list(barabasi_albert_edges(2000, 3, seed=1)))
+        self.assertEqual(len(edges), 3 * (2000 - 3))
+        self.assertEqual(len({frozenset(edge) for edge in edges}), len(edges))
+        # Preferential attachment grows hubs far above the mean degree of 6
+        degree = {}
+        for a, b in edges:
+            degree[a] = degree.get(a, 0) + 1
+            degree[b] = degree.get(b, 0) + 1
+        assert max(degree.values()) > 60
+        with self.assertRaises(ValueError):
+            list(barabasi_albert_edges(3, 3))
+
+    def test_write_graph_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'grid.txt')
+            assert write_graph_file(file_name, 12, grid_edges(3, 4)) == 17
+            graph = Graph()
+            graph.read_graph_from_file(file_name)
+
+        assert graph.num_vertices == 12 and graph.edge_count == 17
+        self.assertEqual(len(graph.find_shortest_path('0', '11')), 6)
+
+    def test_benchmark(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.json')
+            graph_benchmark.main(['--generator', 'grid', '--generator', 'ba', '--min-edges', '100',
+                                  '--max-edges', '1000', '--queries', '2', '--output', output])
+            with open(output) as file:
+                results = json.load(file)
+
+        records = results['results']
+        self.assertEqual(len(records), 2 * 2 * len(graph_benchmark.OPERATIONS))
+        assert all(record['seconds'] >= 0 and record['peak_bytes'] > 0 for record in records)
+        self.assertEqual(len(graph_benchmark.compare(records, records)), len(records))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,261 @@
+#!python
+from array import array
+from heapq import heappop, heappush
+import math
+import mmap
+import struct
+
+
+""" LandmarkOracle Class
+Precomputed distances from (and, on directed graphs, to) k landmark
+vertices of a FrozenGraph. By the triangle inequality they bound the
+distance between any two vertices, which answers distance estimates
+without a search and makes an ALT heuristic (A*, landmarks, triangle
+inequality) for exact lowest weight paths.
+
+    oracle = build_landmarks(graph, k=8)
+    lower, upper = oracle.estimate_distance('Ramon Geronimo', 'Danesky Orlandini')
+    oracle.save('graph.landmarks')
+    oracle = load_landmarks('graph.landmarks', graph.freeze())
+
+The oracle describes the snapshot it was built from, so rebuild it
+after the graph changes.
+"""
+
+
+class LandmarkOracle(object):
+
+    def __init__(self, frozen, landmarks, forward, backward=None):
+        """Initialize an oracle from its landmark ids and distance arrays.
+
+        forward: flat array, forward[i * n + v] is the distance from
+        landmark i to vertex v, math.inf if unreachable.
+        backward: the distances from every vertex to each landmark,
+        only needed for directed graphs.
+        """
+        self.frozen = frozen
+        self.landmarks = landmarks
+        n = frozen.num_vertices
+        # One memoryview row per landmark, sliced without copying
+        forward = memoryview(forward)
+        self.forward = [forward[i * n:(i + 1) * n] for i in range(len(landmarks))]
+        if frozen.directed:
+            backward = memoryview(backward)
+            self.backward = [backward[i * n:(i + 1) * n] for i in range(len(landmarks))]
+        else:
+            self.backward = self.forward
+
+    def estimate_distance(self, start, end):
+        """Return (lower, upper) bounds on the distance from start to end."""
+        start_id = self.frozen.vertex_id(start)
+        end_id = self.frozen.vertex_id(end)
+        return self._lower_bound(start_id, end_id), self._upper_bound(start_id, end_id)
+
+    def lower_bound(self, start, end):
+        """Return a lower bound on the distance from start to end.
+
+        Usable as the heuristic of find_weighted_shortest_path.
+        """
+        return self._lower_bound(self.frozen.vertex_id(start), self.frozen.vertex_id(end))
+
+    def _lower_bound(self, u, v):
+        '''Best triangle inequality lower bound on the distance from id u to id v'''
+        bound = 0
+        for from_landmark, to_landmark in zip(self.forward, self.backward):
+            # A landmark reaching u but not v proves u can't reach v
+            if from_landmark[u] < math.inf:
+                if from_landmark[v] == math.inf:
+                    return math.inf
+                bound = max(bound, from_landmark[v] - from_landmark[u])
+            if to_landmark[v] < math.inf:
+                if to_landmark[u] == math.inf:
+                    return math.inf
+                bound = max(bound, to_landmark[u] - to_landmark[v])
+        return bound
+
+    def _upper_bound(self, u, v):
+        '''Shortest detour from id u to id v through a landmark, math.inf if none'''
+        if u == v:
+            return 0
+        return min((to_landmark[u] + from_landmark[v]
+                    for from_landmark, to_landmark in zip(self.forward, self.backward)),
+                   default=math.inf)
+
+    def find_shortest_path(self, start, end):
+        '''Return the keys along a path with the fewest edges from start to end, or None
+
+        Pairs the landmarks prove unreachable return None without a
+        search, the rest use a bidirectional breadth first search.
+        '''
+        frozen = self.frozen
+        if self._lower_bound(frozen.vertex_id(start), frozen.vertex_id(end)) == math.inf:
+            return None
+        # Hop count bounds are too loose on small-world graphs to beat
+        # a bidirectional breadth first search, and on weighted graphs
+        # the landmark distances don't bound hop counts at all
+        return frozen.find_shortest_path(start, end, bidirectional=True)
+
+    def find_weighted_shortest_path(self, start, end):
+        '''Return the keys along a lowest weight path from start to end, or None, using A* with landmark bounds
+
+        Pairs the landmarks prove unreachable return None without a search.
+        '''
+        frozen = self.frozen
+        start_id = frozen.vertex_id(start)
+        end_id = frozen.vertex_id(end)
+        if self._lower_bound(start_id, end_id) == math.inf:
+            return None
+
+        offsets, targets, weights = frozen.offsets, frozen.targets, frozen.weights
+        distances = {start_id: 0}
+        parents = {start_id: -1}
+        settled = set()
+        bounds = {}
+        heap = [(self._lower_bound(start_id, end_id), start_id)]
+
+        while len(heap) > 0:
+            _, u = heappop(heap)
+            if u == end_id:
+                path = [end_id]
+                while parents[path[-1]] != -1:
+                    path.append(parents[path[-1]])
+                return [frozen.keys[i] for i in reversed(path)]
+            # Skip stale heap entries
+            if u in settled:
+                continue
+            settled.add(u)
+
+            for position in range(offsets[u], offsets[u + 1]):
+                v = targets[position]
+                distance = distances[u] + weights[position]
+                if v not in distances or distance < distances[v]:
+                    # The bound of a vertex never changes during one search
+                    bound = bounds.get(v)
+                    if bound is None:
+                        bound = bounds[v] = self._lower_bound(v, end_id)
+                    # Prune vertices that can't reach the end at all
+                    if bound == math.inf:
+                        continue
+                    distances[v] = distance
+                    parents[v] = u
+                    heappush(heap, (distance + bound, v))
+
+        return None
+
+    def save(self, path):
+        '''Write the landmarks and their distances to path, for load_landmarks'''
+        frozen = self.frozen
+        with open(path, 'wb') as file:
+            file.write(_HEADER.pack(_MAGIC, _VERSION, 1 if frozen.directed else 0,
+                                    len(self.landmarks), frozen.num_vertices))
+            file.write(array('q', self.landmarks).tobytes())
+            rows = self.forward + (self.backward if frozen.directed else [])
+            for row in rows:
+                file.write(row.cast('B'))
+
+
+# Landmark file: a fixed header, the landmark ids, then one row of
+# float64 distances per landmark, from the landmarks and then to them.
+_MAGIC = b'GLMK'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHHqq')
+
+
+def build_landmarks(graph, k=8, strategy='degree'):
+    '''Pick k landmarks of a Graph or FrozenGraph and precompute their distances
+
+    strategy: 'degree' picks the vertices with the most edges,
+    'farthest' picks each next landmark as far as possible from the
+    ones already chosen.
+    '''
+    frozen = graph.freeze() if hasattr(graph, 'freeze') else graph
+    n = frozen.num_vertices
+    k = min(k, n)
+    if strategy not in ('degree', 'farthest'):
+        raise ValueError(f"strategy must be 'degree' or 'farthest', not {strategy!r}")
+
+    def degree(v):
+        return (frozen.offsets[v + 1] - frozen.offsets[v] +
+                frozen.in_offsets[v + 1] - frozen.in_offsets[v])
+
+    if strategy == 'degree':
+        landmarks = sorted(range(n), key=degree, reverse=True)[:k]
+    else:
+        landmarks = [max(range(n), key=degree)] if k > 0 else []
+
+    forward, backward = array('d'), array('d')
+    # Distance from each vertex to its nearest landmark so far
+    nearest = array('d', [math.inf]) * n
+    i = 0
+    while i < len(landmarks):
+        row = _distances(frozen, landmarks[i], False)
+        forward.extend(row)
+        if frozen.directed:
+            backward.extend(_distances(frozen, landmarks[i], True))
+        if strategy == 'farthest' and len(landmarks) < k:
+            for v in range(n):
+                nearest[v] = min(nearest[v], row[v])
+            # Unreachable vertices come first, so other components get a landmark
+            chosen = set(landmarks)
+            landmarks.append(max((v for v in range(n) if v not in chosen), key=nearest.__getitem__))
+        i += 1
+
+    return LandmarkOracle(frozen, landmarks, forward, backward if frozen.directed else None)
+
+
+def load_landmarks(path, frozen):
+    '''Memory-map landmarks saved with LandmarkOracle.save for the same FrozenGraph'''
+    with open(path, 'rb') as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(buffer)
+    magic, version, directed, k, n = _HEADER.unpack_from(view)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError('not a landmark file')
+    if n != frozen.num_vertices or bool(directed) != frozen.directed:
+        raise ValueError('landmarks were computed for another graph')
+
+    position = _HEADER.size
+    landmarks = view[position:position + 8 * k].cast('q')
+    position += 8 * k
+    forward = view[position:position + 8 * k * n].cast('d')
+    position += 8 * k * n
+    backward = view[position:position + 8 * k * n].cast('d') if directed else None
+    return LandmarkOracle(frozen, list(landmarks), forward, backward)
+
+
+def _distances(frozen, source, reverse):
+    '''Return the distances from source, or to it when reverse, as an array with math.inf if unreachable'''
+    if reverse:
+        offsets, targets, weights = frozen.in_offsets, frozen.in_sources, frozen.in_weights
+    else:
+        offsets, targets, weights = frozen.offsets, frozen.targets, frozen.weights
+    distances = array('d', [math.inf]) * frozen.num_vertices
+    distances[source] = 0
+
+    if not frozen.weighted:
+        # Breadth first search on hop counts
+        frontier = [source]
+        distance = 0
+        while len(frontier) > 0:
+            distance += 1
+            next_frontier = []
+            for u in frontier:
+                for position in range(offsets[u], offsets[u + 1]):
+                    v = targets[position]
+                    if distances[v] == math.inf:
+                        distances[v] = distance
+                        next_frontier.append(v)
+            frontier = next_frontier
+        return distances
+
+    heap = [(0, source)]
+    while len(heap) > 0:
+        distance, u = heappop(heap)
+        if distance > distances[u]:
+            continue
+        for position in range(offsets[u], offsets[u + 1]):
+            v = targets[position]
+            if distance + weights[position] < distances[v]:
+                distances[v] = distance + weights[position]
+                heappush(heap, (distances[v], v))
+    return distances
@@ -0,0 +1,81 @@
+#!python
+
+from frozen_graph_test import random_graph
+from graph import Graph
+from graph_landmarks import build_landmarks, load_landmarks
+import math
+import os
+import tempfile
+import unittest
+
+
+class LandmarkOracleTest(unittest.TestCase):
+
+    def test_estimate_distance(self):
+        for directed in (True, False):
+            graph = random_graph(17, directed, num_edges=160)
+            for strategy in ('degree', 'farthest'):
+                oracle = build_landmarks(graph, k=4, strategy=strategy)
+                assert len(oracle.landmarks) == 4
+                for start in range(0, 80, 3):
+                    distances = graph.shortest_distances(start)
+                    for end in range(0, 80, 7):
+                        distance = distances.get(graph.get_vertex(end), math.inf)
+                        lower, upper = oracle.estimate_distance(start, end)
+                        # The true distance always lies between the bounds
+                        assert lower <= distance <= upper
+        with self.assertRaises(ValueError):
+            build_landmarks(graph, strategy='random')
+
+    def test_find_weighted_shortest_path(self):
+        for directed in (True, False):
+            graph = random_graph(18, directed, num_edges=160)
+            oracle = build_landmarks(graph, k=3, strategy='farthest')
+            for start in range(0, 80, 5):
+                distances = graph.shortest_distances(start)
+                for end in range(0, 80, 3):
+                    path = oracle.find_weighted_shortest_path(start, end)
+                    if graph.get_vertex(end) not in distances:
+                        assert path is None
+                        assert oracle.find_shortest_path(start, end) is None
+                        continue
+                    # Fewest edges, as on the graph itself
+                    hops = oracle.find_shortest_path(start, end)
+                    self.assertEqual(len(hops), len(graph.find_shortest_path(start, end)))
+                    weight = sum(graph.get_vertex(a).get_edge_weight(graph.get_vertex(b))
+                                 for a, b in zip(path, path[1:]))
+                    self.assertEqual(weight, distances[graph.get_vertex(end)])
+                    # The bounds also work as the heuristic of the Vertex graph's A*
+                    other = graph.find_weighted_shortest_path(start, end, heuristic=oracle.lower_bound)
+                    self.assertEqual(sum(a.get_edge_weight(b) for a, b in zip(other, other[1:])), weight)
+
+        # Unweighted graphs get hop counts
+        graph = Graph(directed=False)
+        for key in range(20):
+            graph.add_edge(key, key + 1)
+        graph.add_edge(0, 10)
+        oracle = build_landmarks(graph, k=2)
+        self.assertEqual(oracle.find_shortest_path(0, 12), [0, 10, 11, 12])
+        self.assertEqual(oracle.find_weighted_shortest_path(0, 12), [0, 10, 11, 12])
+        self.assertEqual(oracle.estimate_distance(0, 0), (0, 0))
+
+    def test_save(self):
+        graph = random_graph(19, True, num_edges=160)
+        frozen = graph.freeze()
+        oracle = build_landmarks(frozen, k=5)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'graph.landmarks')
+            oracle.save(path)
+            loaded = load_landmarks(path, frozen)
+
+            self.assertEqual(loaded.landmarks, oracle.landmarks)
+            for start in range(0, 80, 4):
+                for end in range(0, 80, 9):
+                    self.assertEqual(loaded.estimate_distance(start, end),
+                                     oracle.estimate_distance(start, end))
+            with self.assertRaises(ValueError):
+                load_landmarks(path, random_graph(19, True, num_vertices=81).freeze())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+#!python
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from graph import Graph, _parse_weight
+import gc
+import os
+
+
+""" Parallel graph loader
+Loads one or more edge list files in the G/D format of
+Graph.read_graph_from_file, such as the shards of one graph. Every file
+is cut into byte ranges on line boundaries. Worker processes parse the
+ranges into compact arrays: the keys of the chunk, and for every edge
+the positions of its endpoints in them plus its weight. The chunks are
+then merged in file order with Graph.add_edge_arrays, so the vertices
+come out in the same order as a serial read.
+
+    graph = read_graph_files(['shard-0.txt', 'shard-1.txt'], processes=8)
+"""
+
+
+def read_graph_files(paths, processes=None, chunk_bytes=1 << 24, graph=None):
+    '''Load the G/D edge list files at paths into graph, a new Graph by default, and return it
+
+    processes: worker processes parsing chunks, os.cpu_count() by
+    default, 1 to parse in this process.
+    chunk_bytes: target size of the byte range one worker parses.
+    '''
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    if graph is None:
+        graph = Graph()
+
+    tasks = []
+    graph_type = None
+    for path in paths:
+        header_type, vertices, body_start = _read_header(path)
+        # Shards of one graph share its type
+        if graph_type is not None and header_type != graph_type:
+            raise ValueError(f'{path} is not the same type of graph as {paths[0]}')
+        graph_type = header_type
+        if graph.num_vertices == 0:
+            graph.directed = graph_type == 'D'
+            graph.weighted = False
+        for key in vertices:
+            if key not in graph.vertex_list:
+                graph.add_vertex(key)
+        tasks.extend((path, start, end) for start, end in _chunk_ranges(path, body_start, chunk_bytes))
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    # Millions of new dictionaries would trigger many full collections,
+    # none of which can free anything while the graph is being built
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        count = 0
+        if processes <= 1 or len(tasks) <= 1:
+            for task in tasks:
+                count += graph.add_edge_arrays(*_parse_chunk(task))
+        else:
+            with ProcessPoolExecutor(processes) as executor:
+                # Results arrive in task order, so vertices keep the file order
+                for chunk in executor.map(_parse_chunk, tasks):
+                    count += graph.add_edge_arrays(*chunk)
+    finally:
+        if collecting:
+            gc.enable()
+
+    if graph.stats is not None:
+        graph.stats.edges_read += count
+    return graph
+
+
+def _read_header(path):
+    '''Return the graph type, the vertex keys and the byte offset of the first edge of a file'''
+    with open(path, 'rb') as file:
+        # Checks for valid types
+        graph_type = file.readline().decode('utf-8').strip().upper()
+        if graph_type not in ('G', 'D'):
+            raise ValueError(f'G or D is not specified in {path}')
+        vertices = file.readline().decode('utf-8').rstrip().split(',')
+        return graph_type, vertices, file.tell()
+
+
+def _chunk_ranges(path, start, chunk_bytes):
+    '''Return (start, end) byte ranges of about chunk_bytes from start to the end of the file, cut after newlines'''
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, 'rb') as file:
+        while start < size:
+            end = start + chunk_bytes
+            if end < size:
+                # Extend the range to the end of the line it cuts
+                file.seek(end)
+                file.readline()
+                end = file.tell()
+            else:
+                end = size
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _parse_chunk(task):
+    '''Parse the edges in one byte range of a file into (keys, sources, targets, weights)'''
+    path, start, end = task
+    with open(path, 'rb') as file:
+        file.seek(start)
+        text = file.read(end - start).decode('utf-8')
+
+    # Chunk-local ids of the keys, in order of first appearance
+    index = {}
+    keys = []
+    sources = array('q')
+    targets = array('q')
+    weights = array('q')
+    weighted = False
+    for line in text.splitlines():
+        if not line or line.isspace():
+            continue
+        # The same split as _parse_edge, inlined for the hot loop
+        edge = line.strip().strip('()').split(',')
+        if len(edge) < 2:
+            raise ValueError(f'malformed edge line {line!r} in {path}')
+        i = index.get(edge[0])
+        if i is None:
+            i = index[edge[0]] = len(keys)
+            keys.append(edge[0])
+        sources.append(i)
+        i = index.get(edge[1])
+        if i is None:
+            i = index[edge[1]] = len(keys)
+            keys.append(edge[1])
+        targets.append(i)
+
+        weight = _parse_weight(edge[2]) if len(edge) == 3 else 1
+        if type(weight) is not int and isinstance(weights, array):
+            # Keep float weights, even 1.0, exactly as a serial read would
+            weights = list(weights)
+        if weight != 1:
+            weighted = True
+        weights.append(weight)
+
+    # Float weights are kept even when they all equal 1
+    return keys, sources, targets, weights if weighted or isinstance(weights, list) else None
@@ -0,0 +1,87 @@
+#!python
+
+from graph import Graph
+from graph_generators import barabasi_albert_edges, write_graph_file
+from graph_loader import read_graph_files
+import os
+import random
+import tempfile
+import unittest
+
+
+class GraphLoaderTest(unittest.TestCase):
+
+    def assertSameGraph(self, loaded, expected):
+        self.assertEqual(list(loaded.vertex_list), list(expected.vertex_list))
+        self.assertEqual(loaded.get_edge_list(), expected.get_edge_list())
+        assert loaded.directed == expected.directed and loaded.weighted == expected.weighted
+        assert loaded.num_vertices == expected.num_vertices
+        assert loaded.edge_count == expected.edge_count
+
+    def test_chunks(self):
+        expected = Graph()
+        expected.read_graph_from_file('graph_data.txt')
+        # Chunks of a few bytes cut almost every line
+        for chunk_bytes in (1, 7, 100, 1 << 24):
+            for processes in (1, 2):
+                loaded = read_graph_files('graph_data.txt', processes, chunk_bytes)
+                self.assertSameGraph(loaded, expected)
+
+    def test_shards(self):
+        rand = random.Random(33)
+        edges = [(a, b, rand.choice([1, 2, 2.5])) for a, b in barabasi_albert_edges(300, 3, 33)]
+        with tempfile.TemporaryDirectory() as directory:
+            whole = os.path.join(directory, 'whole.txt')
+            write_graph_file(whole, 300, edges, directed=True)
+            expected = Graph()
+            expected.read_graph_from_file(whole)
+
+            paths = []
+            for shard in range(3):
+                path = os.path.join(directory, f'shard-{shard}.txt')
+                write_graph_file(path, 300, edges[shard::3], directed=True)
+                paths.append(path)
+            # A blank line is skipped
+            with open(paths[0], 'a') as file:
+                file.write('\n')
+
+            loaded = read_graph_files(paths, processes=2, chunk_bytes=512)
+            self.assertEqual(set(loaded.vertex_list), set(expected.vertex_list))
+            self.assertEqual(loaded.get_edge_list(), expected.get_edge_list())
+            assert loaded.directed and loaded.weighted
+            assert loaded.edge_count == expected.edge_count == len(edges)
+            self.assertSameGraph(read_graph_files(whole, processes=3, chunk_bytes=256), expected)
+
+            # Shards must agree on the type of graph
+            write_graph_file(paths[1], 300, edges[1::3], directed=False)
+            with self.assertRaises(ValueError):
+                read_graph_files(paths, processes=1)
+
+            # Load more edges into an existing graph
+            graph = Graph()
+            graph.add_edge('x', 'y')
+            read_graph_files(paths[2], processes=1, graph=graph)
+            assert graph.num_vertices == 302 and graph.edge_count == 1 + len(edges[2::3])
+
+    def test_lines(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'graph.txt')
+            with open(path, 'w') as file:
+                file.write('G\na,b,c\n(a,b,1.0)\n\n  \n(b,c)\n')
+            expected = Graph()
+            expected.read_graph_from_file(path)
+            for processes in (1, 2):
+                loaded = read_graph_files(path, processes, chunk_bytes=4)
+                self.assertSameGraph(loaded, expected)
+                weight = loaded.vertex_list['a'].neighbors[loaded.vertex_list['b']]
+                assert weight == 1.0 and type(weight) is float
+
+            # Lines with fewer than two keys are not skipped
+            with open(path, 'a') as file:
+                file.write('(a)\n')
+            with self.assertRaises(ValueError):
+                read_graph_files(path, processes=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
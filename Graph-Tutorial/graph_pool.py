@@ -0,0 +1,93 @@
+#!python
+from concurrent.futures import ProcessPoolExecutor
+from frozen_graph import attach_shared_memory
+
+
+""" GraphQueryPool Class
+Fans batches of path and k-hop queries out to worker processes that
+share one read-only copy of a frozen graph. The snapshot is published
+once into multiprocessing.shared_memory and every worker attaches to
+it without copying, so memory doesn't grow with the number of workers.
+
+    with GraphQueryPool(graph, processes=4) as pool:
+        paths = pool.shortest_paths([('A', 'B'), ('C', 'D')])
+        friends_of_friends = pool.neighbors(['A', 'C'], 2)
+"""
+
+
+class GraphQueryPool(object):
+
+    def __init__(self, graph, processes=None, chunk_size=64, mp_context=None):
+        """Publish a Graph or FrozenGraph to shared memory and start the workers.
+
+        chunk_size: queries sent to a worker at a time.
+        mp_context: multiprocessing context used to start the workers.
+        """
+        frozen = graph.freeze() if hasattr(graph, 'freeze') else graph
+        self.chunk_size = chunk_size
+        self.memory = frozen.to_shared_memory()
+        try:
+            self.executor = ProcessPoolExecutor(processes, mp_context, initializer=_attach_worker,
+                                                initargs=(self.memory.name,))
+        except BaseException:
+            self._release()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def shortest_paths(self, pairs, bidirectional=True):
+        """Return the key path, or None, of every (start, end) pair, in order."""
+        return self._map(_shortest_paths, [(start, end, bidirectional) for start, end in pairs])
+
+    def neighbors(self, keys, n):
+        """Return the set of keys exactly n edges away from every key, in order."""
+        return self._map(_neighbors, [(key, n) for key in keys])
+
+    def close(self):
+        """Stop the workers and free the shared memory."""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        self._release()
+
+    def _release(self):
+        '''Close and unlink the shared memory block'''
+        if self.memory is not None:
+            self.memory.close()
+            self.memory.unlink()
+            self.memory = None
+
+    def _map(self, function, queries):
+        '''Run function on chunks of queries in the workers and return the flattened results'''
+        if self.executor is None:
+            raise ValueError('the pool is closed')
+        chunks = [queries[i:i + self.chunk_size] for i in range(0, len(queries), self.chunk_size)]
+        results = []
+        for chunk in self.executor.map(function, chunks):
+            results.extend(chunk)
+        return results
+
+
+# The snapshot a worker process attached to
+_pool_graph = None
+
+
+def _attach_worker(name):
+    '''Attach a worker process to the published snapshot'''
+    global _pool_graph
+    _pool_graph = attach_shared_memory(name)
+
+
+def _shortest_paths(queries):
+    '''Answer a chunk of shortest path queries in a worker process'''
+    return [_pool_graph.find_shortest_path(start, end, bidirectional)
+            for start, end, bidirectional in queries]
+
+
+def _neighbors(queries):
+    '''Answer a chunk of k-hop queries in a worker process'''
+    return [_pool_graph.breadth_first_search(key, n) for key, n in queries]
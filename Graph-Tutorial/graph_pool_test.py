@@ -0,0 +1,50 @@
+#!python
+
+from frozen_graph_test import random_graph
+from graph import Graph
+from graph_pool import GraphQueryPool
+import multiprocessing
+import unittest
+
+
+class GraphQueryPoolTest(unittest.TestCase):
+
+    def test_queries(self):
+        for directed in (True, False):
+            graph = random_graph(32, directed)
+            frozen = graph.freeze()
+            pairs = [(a, (a * 11) % 80) for a in range(80)]
+            with GraphQueryPool(graph, processes=2, chunk_size=7) as pool:
+                paths = pool.shortest_paths(pairs)
+                neighbors = pool.neighbors(range(0, 80, 3), 2)
+                with self.assertRaises(KeyError):
+                    pool.shortest_paths([(0, 'missing')])
+
+            self.assertEqual(len(paths), len(pairs))
+            for (start, end), path in zip(pairs, paths):
+                expected = frozen.find_shortest_path(start, end)
+                if expected is None:
+                    assert path is None
+                else:
+                    self.assertEqual((path[0], path[-1], len(path)), (start, end, len(expected)))
+            self.assertEqual(neighbors, [frozen.breadth_first_search(key, 2) for key in range(0, 80, 3)])
+
+        # The pool frees its shared memory once closed
+        with self.assertRaises(ValueError):
+            pool.neighbors([0], 1)
+        assert pool.memory is None
+
+    def test_spawned_workers(self):
+        graph = Graph()
+        graph.read_graph_from_file('graph_data.txt')
+        frozen = graph.freeze()
+        # Spawned workers inherit nothing, everything comes from shared memory
+        with GraphQueryPool(frozen, processes=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+            self.assertEqual(pool.shortest_paths([('Ramon Geronimo', 'Danesky Orlandini')]),
+                             [frozen.find_shortest_path('Ramon Geronimo', 'Danesky Orlandini', True)])
+            self.assertEqual(pool.neighbors(['Ramon Geronimo'], 1),
+                             [frozen.breadth_first_search('Ramon Geronimo', 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
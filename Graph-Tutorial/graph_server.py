@@ -0,0 +1,250 @@
+#!python
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from frozen_graph import attach_shared_memory
+import asyncio
+import json
+import socket
+
+
+""" GraphServer Class
+Loads a graph once and answers newline-delimited JSON queries over a
+local TCP or Unix socket with asyncio. Each request is one JSON object
+per line, answered by one line with the same id:
+
+    {"id": 1, "op": "shortest_path", "start": "A", "end": "B"}
+    {"id": 1, "result": ["A", "C", "B"]}
+
+    {"id": 2, "op": "neighbors", "key": "A", "k": 2}
+    {"id": 3, "op": "recommend", "key": "A", "top_k": 10, "metric": "jaccard"}
+    {"id": 3, "result": [["D", 0.5], ["E", 0.25]]}
+
+    {"id": 4, "op": "clique"}
+    {"id": 5, "op": "nope"}
+    {"id": 5, "error": "unknown op 'nope'"}
+
+Path, neighbor and recommend queries that arrive together are answered as one
+batch on an executor, so the event loop stays free to read sockets.
+Responses on one connection may come back out of order.
+"""
+
+
+class GraphServer(object):
+
+    def __init__(self, graph, processes=None, max_batch=64):
+        """Initialize a server for a loaded Graph.
+
+        processes: answer batches in that many worker processes instead
+        of threads, all attached to one shared memory copy of the
+        frozen graph.
+        """
+        self.graph = graph
+        self.frozen = graph.freeze()
+        self.processes = processes
+        self.max_batch = max_batch
+        self.batches = 0
+        self.queries = 0
+        self._queue = None
+        self._executor = None
+        self._memory = None
+        self._workers = []
+        self._clique = None
+
+    async def start(self, host='127.0.0.1', port=0, path=None):
+        """Start listening on host:port, or on the Unix socket path, and return the asyncio server."""
+        if self.processes:
+            self._memory = self.frozen.to_shared_memory()
+            self._executor = ProcessPoolExecutor(self.processes, initializer=_init_worker,
+                                                 initargs=(self._memory.name,))
+        else:
+            self._executor = ThreadPoolExecutor(1)
+        self._queue = asyncio.Queue()
+        # One batch in flight per worker
+        self._workers = [asyncio.ensure_future(self._answer_batches())
+                         for _ in range(self.processes or 1)]
+
+        if path is not None:
+            return await asyncio.start_unix_server(self._handle, path=path)
+        return await asyncio.start_server(self._handle, host, port)
+
+    async def close(self):
+        """Stop the batch workers and the executor."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._executor is not None:
+            # Waiting for the workers would block the event loop
+            await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+            self._executor = None
+        if self._memory is not None:
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
+
+    async def serve_forever(self, host='127.0.0.1', port=0, path=None):
+        """Serve until cancelled."""
+        server = await self.start(host, port, path)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.close()
+
+    async def _handle(self, reader, writer):
+        '''Answer every query line of one connection'''
+        pending = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.ensure_future(self._respond(line, writer))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            # Answer what was already asked before hanging up
+            if pending:
+                await asyncio.gather(*pending)
+        except (asyncio.CancelledError, ConnectionError):
+            # The server is shutting down or the client went away
+            for task in pending:
+                task.cancel()
+        finally:
+            writer.close()
+
+    async def _respond(self, line, writer):
+        '''Answer one query line and write the response line'''
+        try:
+            query = json.loads(line)
+            if not isinstance(query, dict):
+                raise ValueError('query must be a JSON object')
+        except ValueError as error:
+            response = {'id': None, 'error': f'invalid query: {error}'}
+        else:
+            response = await self.query(query)
+        writer.write(json.dumps(response).encode() + b'\n')
+        await writer.drain()
+
+    async def query(self, query):
+        """Answer one query dictionary and return the response dictionary."""
+        self.queries += 1
+        if query.get('op') == 'clique':
+            return await self._find_clique(query)
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, future))
+        return await future
+
+    async def _find_clique(self, query):
+        '''Answer a clique query, computing the maximum clique once for every caller'''
+        if self._clique is None:
+            loop = asyncio.get_running_loop()
+            # Bron-Kerbosch is already parallel across processes, so it
+            # gets its own thread rather than a batch slot
+            self._clique = loop.run_in_executor(None, self.graph.find_maximum_clique, self.processes)
+        future = self._clique
+        try:
+            clique = await asyncio.shield(future)
+        except Exception as error:
+            # Only a result is kept, the next query tries again
+            if self._clique is future:
+                self._clique = None
+            return {'id': query.get('id'), 'error': str(error)}
+        return {'id': query.get('id'), 'result': sorted(vertex.id for vertex in clique)}
+
+    async def _answer_batches(self):
+        '''Take every query already waiting and answer them as one executor job'''
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            queries = [query for query, _ in batch]
+            # Worker processes already hold the graph, threads share this one
+            frozen = None if self.processes else self.frozen
+            try:
+                responses = await loop.run_in_executor(self._executor, answer_batch, queries, frozen)
+            except Exception as error:
+                responses = [{'id': query.get('id'), 'error': str(error)} for query in queries]
+            self.batches += 1
+            for (_, future), response in zip(batch, responses):
+                if not future.done():
+                    future.set_result(response)
+
+
+# The frozen graph of a worker process
+_worker_graph = None
+
+
+def _init_worker(name):
+    '''Attach a worker process to the frozen graph in shared memory'''
+    global _worker_graph
+    _worker_graph = attach_shared_memory(name)
+
+
+def answer_batch(queries, frozen=None):
+    '''Answer a list of path, neighbor and recommend queries on a FrozenGraph and return the responses'''
+    frozen = frozen if frozen is not None else _worker_graph
+    responses = []
+    for query in queries:
+        op = query.get('op')
+        try:
+            if op == 'shortest_path':
+                start, end = _fields(query, 'start', 'end')
+                result = frozen.find_shortest_path(start, end, bidirectional=True)
+            elif op == 'neighbors':
+                key, = _fields(query, 'key')
+                result = sorted(frozen.breadth_first_search(key, int(query.get('k', 1))))
+            elif op == 'recommend':
+                key, = _fields(query, 'key')
+                result = frozen.recommend(key, int(query.get('top_k', 10)),
+                                          query.get('metric', 'common_neighbors'))
+            else:
+                raise ValueError(f'unknown op {op!r}')
+        except KeyError as error:
+            # Unknown vertex
+            responses.append({'id': query.get('id'), 'error': error.args[0]})
+        except (TypeError, ValueError) as error:
+            responses.append({'id': query.get('id'), 'error': str(error)})
+        else:
+            responses.append({'id': query.get('id'), 'result': result})
+    return responses
+
+
+def _fields(query, *names):
+    '''Return the values of the named query fields, raise ValueError if one is missing'''
+    for name in names:
+        if name not in query:
+            raise ValueError(f'missing field {name!r}')
+    return [query[name] for name in names]
+
+
+def send_queries(queries, host='127.0.0.1', port=None, path=None, timeout=None):
+    '''Send queries to a GraphServer and return the responses in the same order'''
+    if path is not None:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        address = path
+    else:
+        connection = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        address = (host, port)
+    connection.settimeout(timeout)
+
+    # Number the queries so out of order responses can be matched
+    lines = []
+    for i, query in enumerate(queries):
+        lines.append(json.dumps(dict(query, id=i)) + '\n')
+
+    responses = [None] * len(queries)
+    with connection:
+        connection.connect(address)
+        with connection.makefile('rwb') as stream:
+            stream.write(''.join(lines).encode())
+            stream.flush()
+            for _ in range(len(queries)):
+                line = stream.readline()
+                if not line:
+                    raise ConnectionError('server closed the connection')
+                response = json.loads(line)
+                responses[response['id']] = response
+    return responses
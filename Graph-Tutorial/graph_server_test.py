@@ -0,0 +1,110 @@
+#!python
+
+from frozen_graph_test import random_graph
+from graph_server import GraphServer, answer_batch, send_queries
+import asyncio
+import os
+import tempfile
+import unittest
+
+
+def serve_and_send(graph, queries, processes=None, unix=False):
+    '''Start a GraphServer, send it queries from a client thread and return (server, responses)'''
+    server = GraphServer(graph, processes=processes)
+
+    async def run(path):
+        listener = await server.start(port=0, path=path)
+        port = None if path else listener.sockets[0].getsockname()[1]
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, lambda: send_queries(queries, port=port, path=path, timeout=30))
+        finally:
+            listener.close()
+            await listener.wait_closed()
+            await server.close()
+
+    if unix:
+        with tempfile.TemporaryDirectory() as directory:
+            return server, asyncio.run(run(os.path.join(directory, 'graph.sock')))
+    return server, asyncio.run(run(None))
+
+
+class GraphServerTest(unittest.TestCase):
+
+    def test_queries(self):
+        graph = random_graph(21, False, num_edges=120)
+        frozen = graph.freeze()
+        queries = ([{'op': 'shortest_path', 'start': a, 'end': (a * 7) % 80} for a in range(80)] +
+                   [{'op': 'neighbors', 'key': a, 'k': 2} for a in range(0, 80, 5)] +
+                   [{'op': 'recommend', 'key': a, 'metric': 'jaccard'} for a in range(0, 80, 9)])
+        server, responses = serve_and_send(graph, queries)
+
+        self.assertEqual(len(responses), len(queries))
+        for query, response in zip(queries, responses):
+            if query['op'] == 'shortest_path':
+                expected = frozen.find_shortest_path(query['start'], query['end'])
+                if expected is None:
+                    assert response['result'] is None
+                else:
+                    self.assertEqual(len(response['result']), len(expected))
+            elif query['op'] == 'neighbors':
+                self.assertEqual(set(response['result']), frozen.breadth_first_search(query['key'], 2))
+            else:
+                expected = frozen.recommend(query['key'], metric='jaccard')
+                self.assertEqual([tuple(pair) for pair in response['result']], expected)
+        # Queries sent together are answered in batches
+        self.assertEqual(server.queries, len(queries))
+        assert server.batches < len(queries)
+
+    def test_clique(self):
+        graph = random_graph(22, False, num_edges=200)
+        _, responses = serve_and_send(graph, [{'op': 'clique'}] * 3, unix=True)
+        clique = graph.find_maximum_clique()
+        for response in responses:
+            self.assertEqual(len(response['result']), len(clique))
+
+    def test_clique_retry(self):
+        graph = random_graph(22, False, num_edges=200)
+        find_maximum_clique = graph.find_maximum_clique
+        calls = []
+
+        def fail_once(processes=None):
+            calls.append(processes)
+            if len(calls) == 1:
+                raise RuntimeError('worker died')
+            return find_maximum_clique(processes)
+
+        graph.find_maximum_clique = fail_once
+        server = GraphServer(graph)
+
+        async def run():
+            return [await server.query({'id': i, 'op': 'clique'}) for i in range(3)]
+
+        responses = asyncio.run(run())
+        # A failure isn't kept, a success is
+        self.assertEqual(responses[0], {'id': 0, 'error': 'worker died'})
+        for response in responses[1:]:
+            self.assertEqual(len(response['result']), len(find_maximum_clique()))
+        assert len(calls) == 2
+
+    def test_errors(self):
+        graph = random_graph(23, False)
+        responses = answer_batch([{'id': 1, 'op': 'shortest_path', 'start': 0},
+                                  {'id': 2, 'op': 'neighbors', 'key': 'missing'},
+                                  {'id': 3, 'op': 'sort'}], graph.freeze())
+        self.assertEqual([response['id'] for response in responses], [1, 2, 3])
+        for response in responses:
+            assert 'error' in response and 'result' not in response
+
+    def test_processes(self):
+        graph = random_graph(24, True)
+        frozen = graph.freeze()
+        queries = [{'op': 'shortest_path', 'start': a, 'end': 79 - a} for a in range(40)]
+        _, responses = serve_and_send(graph, queries, processes=2)
+        for query, response in zip(queries, responses):
+            expected = frozen.find_shortest_path(query['start'], query['end'])
+            self.assertEqual(response['result'] is None, expected is None)
+
+
+if __name__ == "__main__":
+    unittest.main()
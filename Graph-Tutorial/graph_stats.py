@@ -0,0 +1,45 @@
+#!python
+
+
+""" GraphStats Class
+Counters and per-operation timings collected by an instrumented Graph,
+see Graph.enable_instrumentation.
+"""
+
+
+class GraphStats(object):
+
+    def __init__(self):
+        """Initialize every counter to zero."""
+        self.reset()
+
+    def reset(self):
+        """Set every counter and timing back to zero."""
+        # operation name -> number of calls
+        self.calls = {}
+        # operation name -> total wall time in seconds
+        self.seconds = {}
+        self.vertices_dequeued = 0
+        self.edges_scanned = 0
+        self.sets_allocated = 0
+        self.edges_read = 0
+
+    def record(self, operation, seconds):
+        """Add one call of operation that took seconds."""
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+        self.seconds[operation] = self.seconds.get(operation, 0.0) + seconds
+
+    def mean_seconds(self, operation):
+        """Return the mean wall time of one call of operation."""
+        calls = self.calls.get(operation, 0)
+        return self.seconds[operation] / calls if calls > 0 else 0.0
+
+    def as_dict(self):
+        """Return every counter and timing as a dictionary."""
+        return {'calls': dict(self.calls), 'seconds': dict(self.seconds),
+                'vertices_dequeued': self.vertices_dequeued, 'edges_scanned': self.edges_scanned,
+                'sets_allocated': self.sets_allocated, 'edges_read': self.edges_read}
+
+    def __repr__(self):
+        '''Return representation of the stats'''
+        return f'GraphStats({self.as_dict()})'
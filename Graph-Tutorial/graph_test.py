@@ -1,6 +1,11 @@
 #!python
 
 from graph import Graph, Vertex
+from itertools import combinations
+import math
+import os
+import random
+import tempfile
 import unittest
 
 class VertexTest(unittest.TestCase):
@@ -39,6 +44,22 @@ class VertexTest(unittest.TestCase):
         self.assertCountEqual(ramon.get_neighbors(), [jessie, joel])
         self.assertCountEqual(jessie.get_neighbors(), [])
 
+    def test_iter_neighbors(self):
+        ramon = Vertex('Ramon Geronimo')
+        jessie = Vertex('Jessie Pichardo')
+        joel = Vertex('Joel Pichardo')
+
+        neighbors = ramon.iter_neighbors()
+        ramon.add_neighbor(jessie)
+        ramon.add_neighbor(joel)
+
+        # The view is live and never copies the neighbors
+        self.assertCountEqual(neighbors, [jessie, joel])
+        assert joel in neighbors
+        self.assertCountEqual(jessie.iter_in_neighbors(), [])
+        # Slotted vertices have no per-instance __dict__
+        assert not hasattr(ramon, '__dict__')
+
     def test_get_id(self):
         ramon = Vertex('Ramon Geronimo')
         jessie = Vertex('Jessie Pichardo')
@@ -136,6 +157,46 @@ class GraphTest(unittest.TestCase):
 
         assert ramon.get_edge_weight(fran) == 10
 
+    def test_add_edges(self):
+        graph = Graph(directed=False)
+        count = graph.add_edges([('Ramon Geronimo', 'Jessie Pichardo'),
+                                 ('Jessie Pichardo', 'Joel Pichardo', 5)])
+        ramon = graph.get_vertex('Ramon Geronimo')
+        jessie = graph.get_vertex('Jessie Pichardo')
+        joel = graph.get_vertex('Joel Pichardo')
+
+        assert count == 2
+        assert graph.num_vertices == 3
+        assert graph.weighted
+        self.assertCountEqual(jessie.get_neighbors(), [ramon, joel])
+        assert joel.get_edge_weight(jessie) == 5
+
+    def test_read_graph_from_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            graph_file = os.path.join(directory, 'graph.txt')
+            with open(graph_file, 'w') as file:
+                file.write('D\n1,2,3\n(1,2,4)\n(2,3,1.5)\n\n(3,4)\n')
+            graph = Graph()
+            assert graph.read_graph_from_file(graph_file) == 3
+
+        assert graph.directed and graph.weighted
+        assert graph.num_vertices == 4
+        self.assertEqual(graph.get_edge_list(), {('1', '2', 4), ('2', '3', 1.5), ('3', '4', 1)})
+
+        # An edge line needs two keys
+        with tempfile.TemporaryDirectory() as directory:
+            graph_file = os.path.join(directory, 'graph.txt')
+            with open(graph_file, 'w') as file:
+                file.write('G\n1,2\n(1,2)\n(1)\n')
+            with self.assertRaises(ValueError):
+                Graph().read_graph_from_file(graph_file)
+
+        graph = Graph()
+        graph.read_graph_from_file('graph_data.txt')
+        assert not graph.directed
+        assert graph.num_vertices == 11
+        assert len(graph.get_edge_list()) == 17
+
     def test_get_vertices(self):
         graph = Graph()
 
@@ -153,6 +214,171 @@ class GraphTest(unittest.TestCase):
 
         self.assertCountEqual(graph.get_vertices(), [ramon, jessie, joel, juan, eduardo, fran])
 
+    def test_iter_edges(self):
+        graph = Graph(directed=False)
+        graph.add_edge('Ramon Geronimo', 'Jessie Pichardo')
+        graph.add_edge('Joel Pichardo', 'Jessie Pichardo')
+        graph.add_edges([('Ramon Geronimo', 'Joel Pichardo'), ('Joel Pichardo', 'Ramon Geronimo')])
+
+        # Each undirected edge comes out once, from the endpoint added first
+        self.assertEqual(list(graph.iter_edges()), [('Ramon Geronimo', 'Jessie Pichardo'),
+                                                   ('Ramon Geronimo', 'Joel Pichardo'),
+                                                   ('Jessie Pichardo', 'Joel Pichardo')])
+        assert graph.edge_count == 3
+
+        graph = Graph()
+        graph.read_graph_from_file('graph_data.txt')
+        assert graph.edge_count == 17
+        assert len(list(graph.iter_edges())) == 17
+
+        graph = Graph()
+        graph.add_edge(1, 2, 5)
+        graph.add_edge(2, 1)
+        self.assertEqual(list(graph.iter_edges()), [(1, 2, 5), (2, 1, 1)])
+        assert graph.edge_count == 2
+
+    def test_components(self):
+        graph = Graph()
+        graph.add_edge('A', 'B')
+        graph.add_edge('C', 'B')
+        graph.add_edges([('D', 'E'), ('E', 'F')])
+        graph.add_vertex('G')
+        a, b, c, d, e, f, g = [graph.get_vertex(key) for key in 'ABCDEFG']
+
+        # Directed edges join weakly connected components
+        assert graph.connected('A', 'C')
+        assert not graph.connected('A', 'D')
+        assert graph.component_of('F') is graph.component_of('D')
+        assert graph.num_components == 3
+        self.assertCountEqual(graph.components(), [{a, b, c}, {d, e, f}, {g}])
+
+        # Unreachable across components, without searching
+        stats = graph.enable_instrumentation()
+        assert graph.find_shortest_path('A', 'F') is None
+        assert graph.find_weighted_shortest_path('A', 'F') is None
+        assert stats.vertices_dequeued == 0
+
+        graph.add_edge('C', 'D')
+        assert graph.connected('A', 'G') is False
+        assert graph.num_components == 2
+        self.assertEqual(graph.find_shortest_path('A', 'F'), None)
+        self.assertEqual(graph.find_shortest_path('C', 'F'), [c, d, e, f])
+
+    def test_remove_edge(self):
+        for directed in (True, False):
+            graph = Graph(directed=directed)
+            graph.add_edges([('A', 'B', 2), ('B', 'C'), ('C', 'D'), ('A', 'D', 5)])
+            a, b, c, d = [graph.get_vertex(key) for key in 'ABCD']
+            cache = graph.enable_path_cache()
+            self.assertEqual(graph.find_shortest_path('A', 'C'), [a, b, c])
+
+            self.assertEqual(graph.remove_edge('A', 'B'), 2)
+            assert graph.edge_count == 3 == len(graph.get_edge_list())
+            assert b not in a.get_neighbors() and a not in b.get_neighbors()
+            assert a not in b.iter_in_neighbors()
+            # The cached path went through the removed edge
+            self.assertEqual(graph.find_shortest_path('A', 'C'), None if directed else [a, d, c])
+            assert cache.invalidations > 0
+
+            graph.update_weight('C', 'D', 4)
+            assert c.get_edge_weight(d) == 4 and graph.weighted
+            if not directed:
+                assert d.get_edge_weight(c) == 4
+            with self.assertRaises(KeyError):
+                graph.remove_edge('A', 'B')
+            with self.assertRaises(KeyError):
+                graph.update_weight('B', 'A', 3)
+            with self.assertRaises(KeyError):
+                graph.remove_edge('A', 'Z')
+
+        # Removing the only link splits a component
+        graph = Graph()
+        graph.add_edge('A', 'B')
+        graph.add_edge('C', 'D')
+        graph.add_edge('B', 'C')
+        assert graph.num_components == 1
+        graph.remove_edge('B', 'C')
+        assert graph.find_shortest_path('A', 'D') is None
+        assert not graph.connected('A', 'D')
+        assert graph.num_components == 2
+
+    def test_remove_vertex(self):
+        for directed in (True, False):
+            graph = Graph(directed=directed)
+            graph.add_edges([('A', 'B'), ('B', 'C'), ('C', 'A'), ('D', 'B'), ('B', 'B')])
+            b = graph.remove_vertex('B')
+            a, c, d = [graph.get_vertex(key) for key in 'ACD']
+
+            assert 'B' not in graph.vertex_list and graph.num_vertices == 3
+            assert graph.edge_count == 1 == len(graph.get_edge_list())
+            for vertex in graph:
+                assert b not in vertex.get_neighbors() and b not in vertex.iter_in_neighbors()
+            self.assertCountEqual(graph.components(), [{a, c}, {d}])
+            self.assertEqual(graph.find_shortest_path('C', 'A'), [c, a])
+            with self.assertRaises(KeyError):
+                graph.remove_vertex('B')
+
+            # The key can be used again
+            graph.add_edge('B', 'D')
+            assert graph.num_vertices == 4 and graph.edge_count == 2
+            self.assertEqual(graph.freeze().get_edge_list(), graph.get_edge_list())
+
+    def test_remove_vertex_churn(self):
+        graph = Graph()
+        graph.add_vertex('C')
+        for _ in range(1000):
+            graph.add_edge('A', 'B')
+            assert len(graph.find_shortest_path('A', 'B')) == 2
+            graph.remove_vertex('A')
+            graph.remove_vertex('B')
+        # Searches alone relabel the forest, dropping the removed vertices
+        assert graph.num_vertices == 1
+        assert len(graph._components) <= 5 and graph._components.count <= 5
+
+    def test_apply_mutations(self):
+        graph = Graph(directed=False)
+        graph.add_edges([('A', 'B'), ('B', 'C'), ('C', 'D')])
+        version = graph.version
+        added, removed = graph.apply_mutations(adds=[('A', 'C', 3), ('B', 'C', 2), ('D', 'E')],
+                                               removes=[('B', 'C'), ('C', 'D'), ('A', 'Z'), ('D', 'A')])
+        assert (added, removed) == (3, 2)
+        assert graph.version > version
+        self.assertEqual(graph.get_edge_list(), {('A', 'B', 1), ('A', 'C', 3), ('B', 'C', 2), ('D', 'E', 1)})
+        assert graph.edge_count == 4 and graph.num_vertices == 5
+        assert graph.num_components == 2
+
+        # Nothing to do leaves the graph as it was
+        version = graph.version
+        assert graph.apply_mutations() == (0, 0)
+        assert graph.version == version
+
+    def test_recommend(self):
+        graph = Graph(directed=False)
+        graph.add_edges([('Ramon', 'Jessie'), ('Ramon', 'Juan'), ('Jessie', 'Joel'),
+                         ('Juan', 'Joel'), ('Juan', 'Fran'), ('Fran', 'Mariela'), ('Juan', 'Eli')])
+        joel, fran, eli = [graph.get_vertex(key) for key in ('Joel', 'Fran', 'Eli')]
+
+        # Joel shares Jessie and Juan with Ramon, Fran and Eli only Juan
+        self.assertEqual(graph.recommend('Ramon'), [(joel, 2), (fran, 1), (eli, 1)])
+        self.assertEqual(graph.recommend('Ramon', top_k=1), [(joel, 2)])
+        jaccard = graph.recommend('Ramon', metric='jaccard')
+        self.assertEqual(jaccard, [(joel, 1.0), (eli, 0.5), (fran, 1 / 3)])
+        adamic_adar = dict(graph.recommend('Ramon', metric='adamic_adar'))
+        self.assertAlmostEqual(adamic_adar[joel], 1 / math.log(2) + 1 / math.log(4))
+        self.assertAlmostEqual(adamic_adar[eli], 1 / math.log(4))
+        assert graph.recommend('Mariela') == [(graph.get_vertex('Juan'), 1)]
+
+        with self.assertRaises(ValueError):
+            graph.recommend('Ramon', metric='cosine')
+        with self.assertRaises(KeyError):
+            graph.recommend('Nobody')
+
+        # The batch mode matches one query per vertex
+        for metric in ('common_neighbors', 'jaccard', 'adamic_adar'):
+            everyone = graph.recommend_all(top_k=2, metric=metric)
+            for vertex in graph:
+                self.assertEqual(everyone[vertex], graph.recommend(vertex.id, 2, metric))
+
     def test_breadth_first_search(self):
         graph = Graph()
 
@@ -199,6 +425,68 @@ class GraphTest(unittest.TestCase):
         self.assertCountEqual(new_level_3, [danesky])
 
     
+    def test_instrumentation(self):
+        graph = Graph()
+        graph.add_edge('A', 'B')
+        graph.add_edge('A', 'C')
+        graph.add_edge('B', 'D')
+        graph.add_edge('C', 'D')
+        graph.add_edge('D', 'E')
+        calls = []
+        stats = graph.enable_instrumentation(hook=lambda operation, seconds, stats: calls.append(operation))
+
+        graph.breadth_first_search(graph.get_vertex('A'), 2)
+        # A, B and C were dequeued, scanning their 4 edges
+        assert stats.vertices_dequeued == 3
+        assert stats.edges_scanned == 4
+        assert stats.sets_allocated == 2
+
+        graph.find_shortest_path('A', 'E')
+        graph.find_shortest_path('A', 'E', bidirectional=True)
+        graph.find_maximal_clique()
+        self.assertEqual(calls, ['breadth_first_search', 'find_shortest_path',
+                                 'find_shortest_path', 'find_maximal_clique'])
+        self.assertEqual(stats.calls['find_shortest_path'], 2)
+        assert stats.seconds['find_shortest_path'] > 0
+        assert stats.mean_seconds('find_shortest_path') == stats.seconds['find_shortest_path'] / 2
+
+        graph.disable_instrumentation()
+        graph.find_shortest_path('A', 'E')
+        self.assertEqual(stats.calls['find_shortest_path'], 2)
+        assert graph.stats is None
+
+        graph = Graph()
+        stats = graph.enable_instrumentation()
+        graph.read_graph_from_file('graph_data.txt')
+        assert stats.edges_read == 17
+        self.assertEqual(stats.calls, {'read_graph_from_file': 1})
+
+    def test_bfs_cache(self):
+        rand = random.Random(10)
+        graph = Graph()
+        graph.add_edges((rand.randrange(60), rand.randrange(60)) for _ in range(150))
+        vertices = list(graph)
+        expected = {(v, n): graph.breadth_first_search(v, n) for v in vertices for n in range(-2, 6)}
+
+        cache = graph.enable_bfs_cache(capacity=10)
+        for _ in range(3):
+            for vertex in vertices[:10]:
+                # Deeper levels continue from the cached ones
+                for n in range(6):
+                    self.assertEqual(graph.breadth_first_search(vertex, n), expected[(vertex, n)])
+                # Negative levels don't index from the deepest cached level
+                for n in (-1, -2):
+                    self.assertEqual(graph.breadth_first_search(vertex, n), expected[(vertex, n)])
+        assert cache.hit_rate > 0.9
+        assert len(cache) == 10
+
+        # Adding an edge invalidates the cached levels
+        graph.add_edge('new', vertices[0].id)
+        new = graph.get_vertex('new')
+        self.assertEqual(graph.breadth_first_search(new, 2), expected[(vertices[0], 1)] - {new})
+        self.assertEqual(graph.breadth_first_search(vertices[0], 1), expected[(vertices[0], 1)])
+        assert cache.invalidations == 1
+
     def test_find_shortest_path(self):
         graph = Graph()
         # graph_file = 'graph_data.txt'
@@ -237,6 +525,155 @@ class GraphTest(unittest.TestCase):
         path_3 = graph.find_shortest_path('Ramon Geronimo', 'Danesky Orlandini')
         self.assertEqual(path_3, [ramon, junior, jeffrey, danesky])
 
+        # Searching from both ends walks in-edges back from the end vertex
+        path_2 = graph.find_shortest_path('Ramon Geronimo', 'Jeffrey Orlandini', bidirectional=True)
+        self.assertEqual(path_2, [ramon, junior, jeffrey])
+        path_3 = graph.find_shortest_path('Ramon Geronimo', 'Danesky Orlandini', bidirectional=True)
+        self.assertEqual(path_3, [ramon, junior, jeffrey, danesky])
+
+        assert graph.find_shortest_path('Danesky Orlandini', 'Ramon Geronimo') is None
+        assert graph.find_shortest_path('Danesky Orlandini', 'Ramon Geronimo', bidirectional=True) is None
+        self.assertEqual(graph.find_shortest_path('Ramon Geronimo', 'Ramon Geronimo'), [ramon])
+
+    def test_find_shortest_path_bidirectional(self):
+        rand = random.Random(2)
+        for directed in (True, False):
+            graph = Graph(directed=directed)
+            edges = set()
+            while len(edges) < 300:
+                from_key, to_key = rand.sample(range(100), 2)
+                if (to_key, from_key) not in edges or directed:
+                    edges.add((from_key, to_key))
+            for from_key, to_key in edges:
+                graph.add_edge(from_key, to_key)
+
+            for _ in range(200):
+                start, end = rand.choice(list(graph.vertex_list)), rand.choice(list(graph.vertex_list))
+                path = graph.find_shortest_path(start, end)
+                other = graph.find_shortest_path(start, end, bidirectional=True)
+                if path is None:
+                    assert other is None
+                    continue
+                # Both searches find a valid path of the same length
+                self.assertEqual(len(other), len(path))
+                self.assertEqual((other[0].id, other[-1].id), (start, end))
+                for from_vertex, to_vertex in zip(other, other[1:]):
+                    assert to_vertex in from_vertex.neighbors
+
+    def test_iter_depth_first(self):
+        graph = Graph()
+        graph.add_edge('A', 'B')
+        graph.add_edge('A', 'C')
+        graph.add_edge('B', 'D')
+        graph.add_edge('C', 'D')
+        graph.add_edge('D', 'A')
+        graph.add_edge('E', 'A')
+        a, b, c, d = [graph.get_vertex(key) for key in 'ABCD']
+
+        self.assertEqual(list(graph.iter_depth_first('A')), [a, b, d, c])
+        self.assertEqual(list(graph.iter_depth_first('A', order='post')), [d, b, c, a])
+        # Stopping early only explores what was asked for
+        self.assertEqual(next(graph.iter_depth_first('A')), a)
+        with self.assertRaises(ValueError):
+            list(graph.iter_depth_first('A', order='in'))
+
+        self.assertEqual(graph.depth_first_search('A', 'D'), [a, b, d])
+        self.assertEqual(graph.depth_first_search('C', 'B'), [c, d, a, b])
+        assert graph.depth_first_search('A', 'E') is None
+
+        # Deep graphs don't hit the recursion limit
+        chain = Graph()
+        chain.add_edges((key, key + 1) for key in range(100000))
+        self.assertEqual(len(list(chain.iter_depth_first(0, order='post'))), 100001)
+        self.assertEqual(len(chain.depth_first_search(0, 100000)), 100001)
+
+    def test_find_weighted_shortest_path(self):
+        graph = Graph()
+        graph.add_edge('A', 'B', 1)
+        graph.add_edge('B', 'C', 2)
+        graph.add_edge('A', 'C', 5)
+        graph.add_edge('C', 'D', 1)
+        graph.add_edge('E', 'A', 1)
+        a, b, c, d = [graph.get_vertex(key) for key in 'ABCD']
+
+        # Fewest edges isn't the lowest weight
+        self.assertEqual(graph.find_shortest_path('A', 'D'), [a, c, d])
+        self.assertEqual(graph.find_weighted_shortest_path('A', 'D'), [a, b, c, d])
+        assert graph.find_weighted_shortest_path('A', 'E') is None
+        self.assertEqual(graph.shortest_distances('A'), {a: 0, b: 1, c: 3, d: 4})
+
+        # A* on a grid with the Manhattan distance as heuristic
+        grid = Graph(directed=False)
+        for x in range(10):
+            for y in range(10):
+                if x < 9:
+                    grid.add_edge((x, y), (x + 1, y), 1 if y == 0 else 3)
+                if y < 9:
+                    grid.add_edge((x, y), (x, y + 1), 1 if x == 9 else 3)
+        manhattan = lambda key, end: abs(key[0] - end[0]) + abs(key[1] - end[1])
+        path = grid.find_weighted_shortest_path((0, 0), (9, 9), heuristic=manhattan)
+        self.assertEqual(path, grid.find_weighted_shortest_path((0, 0), (9, 9)))
+        self.assertEqual([vertex.id for vertex in path[:10]], [(x, 0) for x in range(10)])
+
+        graph.add_edge('D', 'E', -1)
+        with self.assertRaises(ValueError):
+            graph.shortest_distances('A')
+
+    def test_path_cache(self):
+        graph = Graph(directed=False)
+        for key in range(10):
+            graph.add_edge(key, key + 1)
+        vertices = [graph.get_vertex(key) for key in range(11)]
+        cache = graph.enable_path_cache(capacity=100)
+
+        self.assertEqual(graph.find_shortest_path(0, 10), vertices)
+        assert cache.misses == 1
+        # Prefixes and the reversed direction come from the cache
+        self.assertEqual(graph.find_shortest_path(0, 4), vertices[:5])
+        self.assertEqual(graph.find_shortest_path(10, 0), vertices[::-1])
+        self.assertEqual(graph.find_shortest_path(6, 0), vertices[6::-1])
+        assert cache.hits == 3 and cache.misses == 1
+
+        # A new edge makes every cached path stale
+        graph.add_edge(0, 10)
+        self.assertEqual(graph.find_shortest_path(0, 10), [vertices[0], vertices[10]])
+        assert cache.invalidations == 1
+
+        graph = Graph()
+        graph.add_edge('A', 'B')
+        cache = graph.enable_path_cache(capacity=2)
+        assert graph.find_shortest_path('B', 'A') is None
+        assert graph.find_shortest_path('B', 'A') is None
+        assert cache.hits == 1
+        # Directed paths aren't reused backward
+        self.assertEqual(len(graph.find_shortest_path('A', 'B')), 2)
+        assert cache.hits == 1
+
+        rand = random.Random(15)
+        graph = Graph()
+        graph.add_edges((rand.randrange(40), rand.randrange(40)) for _ in range(90))
+        expected = {(a, b): graph.find_shortest_path(a, b) for a in graph.vertex_list for b in graph.vertex_list}
+        graph.enable_path_cache(capacity=50)
+        for (a, b), path in expected.items():
+            other = graph.find_shortest_path(a, b)
+            self.assertEqual(other is None, path is None)
+            if path is not None:
+                self.assertEqual((len(other), other[0], other[-1]), (len(path), path[0], path[-1]))
+
+    def test_shortest_paths_concurrent(self):
+        rand = random.Random(3)
+        graph = Graph(directed=False)
+        for key in range(200):
+            graph.add_edge(key, key + 1)
+            if key % 7 == 0:
+                graph.add_edge(key, key + 50)
+        keys = list(graph.vertex_list)
+        pairs = [(rand.choice(keys), rand.choice(keys)) for _ in range(500)]
+
+        paths = graph.shortest_paths_concurrent(pairs, workers=8)
+        # Concurrent answers match the same queries asked one at a time
+        self.assertEqual(paths, [graph.find_shortest_path(start, end) for start, end in pairs])
+
     def test_find_maximal_clique(self):
         graph = Graph()
         graph_file = 'graph_data.txt'
@@ -255,5 +692,37 @@ class GraphTest(unittest.TestCase):
         self.assertTrue(group in possible)
 
 
+    def test_iter_maximal_cliques(self):
+        graph = Graph()
+        graph.read_graph_from_file('graph_data.txt')
+        juan = graph.get_vertex('Juan Geronimo')
+        jessie = graph.get_vertex('Jessie Pichardo')
+        mariela = graph.get_vertex('Mariela Caceres')
+        ramon = graph.get_vertex('Ramon Geronimo')
+        elizabeth = graph.get_vertex('Elizabeth Geronimo')
+
+        cliques = list(graph.iter_maximal_cliques())
+        assert {juan, mariela, jessie} in cliques
+        self.assertEqual(graph.find_maximum_clique(), {ramon, jessie, juan, elizabeth})
+        self.assertCountEqual(graph.iter_maximal_cliques(processes=2), cliques)
+
+        # Every clique found is maximal, and every maximal clique is found
+        rand = random.Random(8)
+        graph = Graph(directed=False)
+        for key in range(12):
+            graph.add_vertex(key)
+        for from_key, to_key in combinations(range(12), 2):
+            if rand.random() < 0.5:
+                graph.add_edge(from_key, to_key)
+        is_clique = lambda keys: all(graph.get_vertex(b) in graph.get_vertex(a).neighbors
+                                     for a, b in combinations(keys, 2))
+        expected = []
+        for size in range(1, 13):
+            for keys in combinations(range(12), size):
+                if is_clique(keys) and not any(is_clique(keys + (k,)) for k in range(12) if k not in keys):
+                    expected.append({graph.get_vertex(k) for k in keys})
+        self.assertCountEqual(graph.iter_maximal_cliques(), expected)
+        self.assertEqual(len(graph.find_maximum_clique()), max(len(clique) for clique in expected))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file